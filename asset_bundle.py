@@ -0,0 +1,183 @@
+"""
+Single-file asset bundle.
+
+Every image is stored as raw pixels (RGB for opaque images, RGBA for the
+others) and every sound effect as raw mixer samples, after an index.
+The loader maps the file (mmap) and builds surfaces with
+pygame.image.frombuffer on top of it: nothing is decoded or read ahead,
+pages come in as the pixels are touched, and processes loading the same
+bundle share them. The map is copy-on-write, so drawing onto a loaded
+surface stays private to the process.
+
+An entry is only used while its source file has the size and mtime it
+had at build time (or when the loose file is gone), so an edited PNG is
+never shadowed by a stale bundle.
+
+Format:
+    header - magic (b'DMNB'), version, index length
+    index - JSON list of entries {path, kind, offset, length, ...}
+    blobs - each aligned to ALIGNMENT bytes
+
+Build it with:  python asset_bundle.py [--output assets.bundle]
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import threading
+
+import pygame
+
+# FORMAT
+MAGIC = b'DMNB'
+VERSION = 1
+HEADER = struct.Struct('<4sBI')  # magic, version, index length
+ALIGNMENT = 64
+
+# DEFAULT LOCATION, NEXT TO THE ASSETS
+BUNDLE_FILE = 'assets.bundle'
+
+
+class BundleError(Exception):
+    """ Raised for files that are not a bundle this version can read """
+
+
+def _source_stamp(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+def _align(offset):
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+def build(output, image_paths, opaque_paths=(), sound_paths=()):
+    """ Writes a bundle of image_paths and sound_paths, returns the entry count
+
+    Args:
+        opaque_paths - images stored without alpha
+        sound_paths - sound effects, stored in the current mixer format (skipped if the mixer is off)
+    """
+    entries = []
+    blobs = []
+
+    for path in image_paths:
+        surface = pygame.image.load(path)
+        pixel_format = 'RGB' if path in opaque_paths else 'RGBA'
+        blobs.append(pygame.image.tobytes(surface, pixel_format))
+        entries.append({'path': path, 'kind': 'image', 'format': pixel_format, 'size': surface.get_size()})
+
+    mixer_format = pygame.mixer.get_init()
+    for path in sound_paths if mixer_format else ():
+        blobs.append(pygame.mixer.Sound(path).get_raw())
+        entries.append({'path': path, 'kind': 'sound', 'format': mixer_format})
+
+    # OFFSETS ARE RELATIVE TO THE FIRST BLOB, SO THE INDEX CAN BE WRITTEN BEFORE KNOWING ITS OWN LENGTH
+    offset = 0
+    for entry, blob in zip(entries, blobs):
+        entry['offset'] = offset
+        entry['length'] = len(blob)
+        entry['source'] = _source_stamp(entry['path'])
+        offset = _align(offset + len(blob))
+
+    index = json.dumps(entries).encode('utf-8')
+    data_start = _align(HEADER.size + len(index))
+
+    temp_path = output + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(index)))
+        f.write(index)
+        for entry, blob in zip(entries, blobs):
+            f.seek(data_start + entry['offset'])
+            f.write(blob)
+        f.truncate(data_start + offset)
+    os.replace(temp_path, output)
+    return len(entries)
+
+
+class Bundle:
+    """ A mapped bundle, images and sounds built on top of the map """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+        magic, version, index_length = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            raise BundleError(f"{path} is not an asset bundle")
+        if version != VERSION:
+            raise BundleError(f"{path} has bundle version {version}, this game reads {VERSION}")
+
+        index = json.loads(self.map[HEADER.size:HEADER.size + index_length])
+        self.data_start = _align(HEADER.size + index_length)
+        self.entries = {entry['path']: entry for entry in index}
+        self.view = memoryview(self.map)
+
+    def _entry(self, path, kind):
+        entry = self.entries.get(path)
+        if entry is None or entry['kind'] != kind:
+            return None
+        try:
+            if list(_source_stamp(path)) != entry['source']:
+                return None  # edited since the bundle was built
+        except OSError:
+            pass  # shipped without the loose file
+        return entry
+
+    def _blob(self, entry):
+        start = self.data_start + entry['offset']
+        return self.view[start:start + entry['length']]
+
+    def image(self, path):
+        """ A Surface over the bundled pixels of path, or None if it is not bundled (or stale) """
+        entry = self._entry(path, 'image')
+        if entry is None:
+            return None
+        return pygame.image.frombuffer(self._blob(entry), tuple(entry['size']), entry['format'])
+
+    def sound(self, path):
+        """ The bundled Sound of path, or None if not bundled, stale or in another mixer format """
+        entry = self._entry(path, 'sound')
+        if entry is None or tuple(entry['format']) != pygame.mixer.get_init():
+            return None
+        return pygame.mixer.Sound(buffer=self._blob(entry))
+
+
+# SHARED INSTANCE, OPENED ON FIRST USE
+_bundle = None
+_opened = False
+_lock = threading.Lock()  # the audio loader thread opens it too
+
+def get_bundle(path=BUNDLE_FILE):
+    """ The mapped bundle, or None if there is none (assets are then loaded one by one) """
+    global _bundle, _opened
+    with _lock:
+        if not _opened:
+            _opened = True
+            try:
+                _bundle = Bundle(path)
+            except FileNotFoundError:
+                _bundle = None
+            except (OSError, ValueError, struct.error, BundleError) as e:
+                print(e)
+                _bundle = None
+    return _bundle
+
+
+def main():
+    import asset_manager as assets
+    import audio
+
+    parser = argparse.ArgumentParser(description='Pack every image and sound effect into one file')
+    parser.add_argument('--output', default=BUNDLE_FILE)
+    args = parser.parse_args()
+
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')  # decoding needs a mixer, not speakers
+    audio.init_mixer()
+
+    count = build(args.output, assets.all_image_paths(), assets.OPAQUE_IMAGES, list(audio.SOUND_FILES.values()))
+    print(f"{count} assets written to {args.output} ({os.path.getsize(args.output) / 1e6:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+import pygame
+
+from asset_bundle import get_bundle
+from background_streamer import BackgroundStreamer
+from sprite_atlas import Atlas
+
+# IMAGE PATHS
+BACKGROUND_COUNT = 7
+PLAYER_COUNT = 5
+ENEMY_COUNT = 7
+
+FLOOR_IMAGE = 'img/floor.png'
+LOGO_IMAGE = 'img/logo.png'
+GROUP_LOGO_IMAGE = 'img/group_logo.png'
+CROWN_IMAGES = ['img/crown.png', 'img/crown_2.png', 'img/crown_3.png']
+
+# STREAMED IMAGES (not preloaded nor cached for good, see background_streamer.py)
+STREAMED_IMAGES = {f'img/bg/{n}.png' for n in range(1, BACKGROUND_COUNT + 1)}
+
+# OPAQUE IMAGES (converted without per-pixel alpha)
+OPAQUE_IMAGES = {FLOOR_IMAGE} | STREAMED_IMAGES
+
+# CACHES
+_images = {}     # path -> Surface
+_converted = set()  # paths whose surface already matches the display format
+_atlas = None       # players and enemies, see sprite_atlas()
+_backgrounds = None # BackgroundStreamer, see background_streamer()
+_masks = {}         # ('player'|'enemy', n, flip) -> pygame.mask.Mask
+
+
+def background_path(level):
+    return f'img/bg/{level}.png'
+
+def player_path(player_type):
+    return f'img/player/{player_type}.png'
+
+def player_icon_path(player_type):
+    return f'img/player_icons/{player_type}.png'
+
+def enemy_path(mob_type):
+    return f'img/enemy/{mob_type}.png'
+
+def all_image_paths():
+    """ Returns every image used by the game """
+    paths = [FLOOR_IMAGE, LOGO_IMAGE, GROUP_LOGO_IMAGE] + CROWN_IMAGES
+    paths += [background_path(n) for n in range(1, BACKGROUND_COUNT + 1)]
+    paths += [player_path(n) for n in range(1, PLAYER_COUNT + 1)]
+    paths += [player_icon_path(n) for n in range(1, PLAYER_COUNT + 1)]
+    paths += [enemy_path(n) for n in range(1, ENEMY_COUNT + 1)]
+    return paths
+
+def _convert(path, surface):
+    """ Converts a surface to the display format, if a display exists """
+    if pygame.display.get_surface() is None:
+        return surface, False
+
+    if path in OPAQUE_IMAGES:
+        return surface.convert(), True
+    return surface.convert_alpha(), True
+
+def decode_image(path):
+    """ Returns a new surface for path: raw pixels from the bundle if one was built, otherwise the decoded file """
+    bundle = get_bundle()
+    if bundle is not None:
+        surface = bundle.image(path)
+        if surface is not None:
+            return surface
+    return pygame.image.load(path)
+
+def load_image(path):
+    """ Returns the cached surface for path, decoding it on first use.
+        Surfaces are converted to the display format as soon as a
+        display mode has been set.
+    """
+    surface = _images.get(path)
+    if surface is not None and path in _converted:
+        return surface
+
+    if surface is None:
+        surface = decode_image(path)
+
+    surface, converted = _convert(path, surface)
+    _images[path] = surface
+    if converted:
+        _converted.add(path)
+
+    return surface
+
+def preload_images(paths=None):
+    """ Decodes (and converts) every image up front so the frame path never does.
+        Backgrounds are streamed instead, only the first one is started here.
+    """
+    if paths is None:
+        paths = [path for path in all_image_paths() if path not in STREAMED_IMAGES]
+        background_streamer().prefetch(1)
+    for path in paths:
+        load_image(path)
+
+def clear_cache():
+    global _atlas, _backgrounds
+    _images.clear()
+    _converted.clear()
+    _atlas = None
+    _backgrounds = None
+    _masks.clear()
+
+# LEVEL BACKGROUNDS
+def background_streamer():
+    """ The shared BackgroundStreamer, created on first use """
+    global _backgrounds
+    if _backgrounds is None:
+        _backgrounds = BackgroundStreamer(lambda n: decode_image(background_path(n)),
+                                          lambda surface: _convert(background_path(1), surface),  # all opaque
+                                          BACKGROUND_COUNT)
+    return _backgrounds
+
+# SPRITE ATLAS
+def sprite_atlas():
+    """ Every player and enemy, facing right and flipped, packed into one Atlas.
+        Built on first use, which must come after the display mode is set.
+    """
+    global _atlas
+    if _atlas is None:
+        atlas = Atlas()
+        for n in range(1, PLAYER_COUNT + 1):
+            image = player_image(n)
+            atlas.add(('player', n, False), image)
+            atlas.add(('player', n, True), pygame.transform.flip(image, True, False))
+        for n in range(1, ENEMY_COUNT + 1):
+            image = enemy_image(n)
+            atlas.add(('enemy', n, False), image)
+            atlas.add(('enemy', n, True), pygame.transform.flip(image, True, False))
+        _atlas = atlas
+    return _atlas
+
+def player_sprite(player_type, flip=False):
+    """ (atlas page, area) of a player """
+    return sprite_atlas().regions[('player', player_type, flip)]
+
+def enemy_sprite(mob_type, flip=False):
+    """ (atlas page, area) of an enemy """
+    return sprite_atlas().regions[('enemy', mob_type, flip)]
+
+# SHORTCUTS
+def background_image(level):
+    return background_streamer().get(level)
+
+def floor_image():
+    return load_image(FLOOR_IMAGE)
+
+def player_image(player_type):
+    return load_image(player_path(player_type))
+
+def player_icon_image(player_type):
+    return load_image(player_icon_path(player_type))
+
+def enemy_image(mob_type):
+    return load_image(enemy_path(mob_type))
+
+def sprite_mask(kind, n, flip=False):
+    """ Collision mask of a player or enemy sprite (kind 'player' or 'enemy'), built once """
+    key = (kind, n, flip)
+    mask = _masks.get(key)
+    if mask is None:
+        image = player_image(n) if kind == 'player' else enemy_image(n)
+        if flip:
+            image = pygame.transform.flip(image, True, False)
+        mask = _masks[key] = pygame.mask.from_surface(image)
+    return mask
+
+def sprite_masks(player_type):
+    """ Returns ((player mask, flipped player mask), {mob type: mask}), see simulation.Hitboxes """
+    mob_masks = {n: sprite_mask('enemy', n) for n in range(1, ENEMY_COUNT + 1)}
+    return (sprite_mask('player', player_type), sprite_mask('player', player_type, True)), mob_masks
+
+def sprite_sizes(player_type):
+    """ Returns (player size, {mob type: size}) for the simulation """
+    mob_sizes = {n: enemy_image(n).get_size() for n in range(1, ENEMY_COUNT + 1)}
+    return player_image(player_type).get_size(), mob_sizes
@@ -0,0 +1,182 @@
+import hashlib
+import os
+import threading
+import time
+
+import pygame
+
+from asset_bundle import get_bundle
+from profiler import PROFILER
+
+# SOUND FILES
+MUSIC_FILE = 'sounds/bg_music.mp3'
+MUSIC_VOLUME = 0.5
+SOUND_FILES = {
+    'jump': 'sounds/jump_sound.mp3',
+    'click': 'sounds/click_sound.mp3',
+    'game_over': 'sounds/game_over_sound.mp3',
+    'hit': 'sounds/hit_sound_effect.mp3',
+}
+
+# DECODED SOUNDS ARE KEPT AS RAW MIXER SAMPLES, KEYED BY SOURCE HASH AND MIXER FORMAT
+CACHE_DIR = 'cache/audio'
+
+# MIXER CHANNELS: EVERY CATEGORY GETS ITS OWN VOICES, SO A SPAMMED SOUND CAN ONLY STEAL FROM ITSELF
+CATEGORIES = {
+    'jump': 'player',
+    'click': 'ui',
+    'game_over': 'events',
+    'hit': 'events',
+}
+VOICES = {'player': 2, 'ui': 1, 'events': 2}  # reserved channels per category
+MIN_INTERVALS = {'jump': 0.08, 'click': 0.05}  # seconds before the same sound may start again
+
+# STATE
+_sounds = {}  # name -> pygame.mixer.Sound, filled in by the loader thread
+_music_loaded = False
+_loader = None
+_voices = {}  # category -> list of [Channel, time it started its sound]
+_last_played = {}  # name -> time it last started
+
+
+def init_mixer():
+    """ Opens the audio device. Returns False if there is none """
+    if pygame.mixer.get_init():
+        if not _voices:
+            reserve_channels()
+        return True
+    try:
+        pygame.mixer.init()
+    except pygame.error as e:
+        print(e)
+        return False
+    reserve_channels()
+    return True
+
+def reserve_channels():
+    """ Sets aside VOICES channels per category; Sound.play never picks them """
+    reserved = sum(VOICES.values())
+    if pygame.mixer.get_num_channels() < reserved * 2:
+        pygame.mixer.set_num_channels(reserved * 2)  # as many again left for unreserved sounds
+    pygame.mixer.set_reserved(reserved)
+
+    _voices.clear()
+    index = 0
+    for category, count in VOICES.items():
+        _voices[category] = [[pygame.mixer.Channel(index + i), 0.0] for i in range(count)]
+        index += count
+
+def cache_path(source, cache_dir=CACHE_DIR):
+    """ Where the samples of an encoded source (bytes) are cached for the current mixer format """
+    frequency, size, channels = pygame.mixer.get_init()
+    digest = hashlib.sha1(source).hexdigest()
+    return os.path.join(cache_dir, f'{digest}-{frequency}-{size}-{channels}.pcm')
+
+def load_sound(path, cache_dir=CACHE_DIR):
+    """ Returns the Sound of path: bundled, cached, or decoded and then cached """
+    bundle = get_bundle()
+    if bundle is not None:
+        sound = bundle.sound(path)
+        if sound is not None:
+            return sound
+
+    with open(path, 'rb') as f:
+        source = f.read()
+    cached = cache_path(source, cache_dir)
+
+    try:
+        with open(cached, 'rb') as f:
+            return pygame.mixer.Sound(buffer=f.read())
+    except FileNotFoundError:
+        pass
+
+    sound = pygame.mixer.Sound(path)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # WRITTEN ASIDE THEN RENAMED, A HALF-WRITTEN FILE IS NEVER PICKED UP
+        temp_path = f'{cached}.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(sound.get_raw())
+        os.replace(temp_path, cached)
+    except OSError as e:
+        print(e)
+    return sound
+
+def _load(on_ready):
+    global _music_loaded
+
+    start = time.perf_counter()
+    try:
+        pygame.mixer.music.load(MUSIC_FILE)
+        pygame.mixer.music.set_volume(MUSIC_VOLUME)
+        _music_loaded = True
+    except pygame.error as e:
+        print(e)
+
+    for name, path in SOUND_FILES.items():
+        try:
+            _sounds[name] = load_sound(path)
+        except (pygame.error, OSError) as e:
+            print(e)
+    PROFILER.record_startup('sound_decode', time.perf_counter() - start)
+
+    if on_ready is not None:
+        on_ready()
+
+def load_async(on_ready=None):
+    """ Opens the mixer, then decodes music and sound effects on a worker thread.
+        Sounds played before they are decoded are skipped.
+
+    Args:
+        on_ready - callable run on the worker once everything is loaded
+    """
+    global _loader
+
+    if _loader is not None or not init_mixer():
+        return
+
+    _loader = threading.Thread(target=_load, args=(on_ready,), name='audio-loader', daemon=True)
+    _loader.start()
+
+def play(name):
+    """ Plays a sound effect on its category's voices.
+        Repeats within MIN_INTERVALS are dropped; with every voice busy,
+        the one that has been playing the longest is cut off.
+    """
+    sound = _sounds.get(name)
+    if sound is None:
+        return
+
+    now = time.perf_counter()
+    if now - _last_played.get(name, float('-inf')) < MIN_INTERVALS.get(name, 0):
+        return
+    _last_played[name] = now
+
+    voices = _voices.get(CATEGORIES.get(name))
+    if not voices:
+        sound.play()
+        return
+
+    voice = next((voice for voice in voices if not voice[0].get_busy()), None)
+    if voice is None:
+        voice = min(voices, key=lambda voice: voice[1])
+    voice[0].play(sound)
+    voice[1] = now
+
+# BACKGROUND MUSIC (no-ops until the music is loaded)
+def play_music():
+    """ Starts looping the music unless it is already playing """
+    if _music_loaded and not pygame.mixer.music.get_busy():
+        pygame.mixer.music.play(-1)
+
+def stop_music():
+    if _music_loaded:
+        pygame.mixer.music.stop()
+
+def pause_music():
+    if _music_loaded:
+        pygame.mixer.music.pause()
+
+def unpause_music():
+    if _music_loaded:
+        pygame.mixer.music.unpause()
@@ -0,0 +1,136 @@
+"""
+Level backgrounds, streamed.
+
+Only the background on screen and the next level's stay in memory. The
+next one is decoded on a worker thread once the run gets within
+PREFETCH_POINTS of the level boundary, and a background is dropped as
+soon as the level after it is shown. Memory stays at two backgrounds
+however many levels there are, and a level change finds its background
+decoded already.
+
+Decoding runs on the worker; converting to the display format (a plain
+copy) runs in get, on the thread that draws.
+"""
+
+import queue
+import threading
+
+import pygame
+
+# DEFAULTS
+PREFETCH_POINTS = 250  # how close to the next level its background starts decoding
+RESIDENT = 2  # backgrounds kept: the current one and those of the next levels
+
+
+class BackgroundStreamer:
+    """ Backgrounds 1..count, the current and next ones resident """
+
+    def __init__(self, decode, convert, count, resident=RESIDENT, prefetch_points=PREFETCH_POINTS):
+        """
+        Args:
+            decode - callable(n) returning background n as a Surface, run on the worker
+            convert - callable(Surface) returning (Surface in the display format, converted)
+            count - number of backgrounds, the one after count is 1 again
+        """
+        self.decode = decode
+        self.convert = convert
+        self.count = count
+        self.resident = resident
+        self.prefetch_points = prefetch_points
+        self.on_evict = None  # callable(Surface) run for every background dropped
+
+        self.current = None
+        self.surfaces = {}  # n -> Surface, decoded
+        self.converted = set()  # n whose surface is in the display format
+        self.pending = set()  # n queued or being decoded
+        self.lock = threading.Lock()
+        self.decoded = threading.Condition(self.lock)
+
+        self.queue = queue.Queue()
+        self.thread = None
+
+    def next_of(self, n):
+        return n % self.count + 1
+
+    def prefetch(self, n):
+        """ Decodes background n on the worker unless it is resident or on its way """
+        with self.lock:
+            if n in self.surfaces or n in self.pending:
+                return
+            self.pending.add(n)
+
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name='background-streamer', daemon=True)
+            self.thread.start()
+        self.queue.put(n)
+
+    def rewind(self, n):
+        """ The next run starts on background n: drops the others and starts decoding n """
+        self.current = n
+        self.evict()
+        self.prefetch(n)
+
+    def update(self, n, points, level_points):
+        """ Call every frame with the background shown, starts the next one near the boundary """
+        if points % level_points >= level_points - self.prefetch_points:
+            self.prefetch(self.next_of(n))
+
+    def get(self, n):
+        """ Background n in the display format, decoded here only if it was never prefetched """
+        surface = self.surfaces.get(n)
+        if surface is None or n not in self.converted:
+            surface = self._wait(n)
+            surface, converted = self.convert(surface)
+            with self.lock:
+                self.surfaces[n] = surface
+            if converted:
+                self.converted.add(n)
+
+        if n != self.current:
+            self.current = n
+            self.evict()
+        return surface
+
+    def wanted(self, n):
+        """ Whether background n may stay resident: it is the current one or one of the next """
+        if self.current is None:
+            return True  # nothing shown yet
+        m = self.current
+        for _ in range(self.resident):
+            if m == n:
+                return True
+            m = self.next_of(m)
+        return False
+
+    def evict(self):
+        """ Drops every background but the current one and the next ones """
+        with self.lock:
+            evicted = [self.surfaces.pop(n) for n in list(self.surfaces) if not self.wanted(n)]
+        self.converted = {n for n in self.converted if self.wanted(n)}
+        if self.on_evict is not None:
+            for surface in evicted:
+                self.on_evict(surface)
+
+    def _wait(self, n):
+        with self.lock:
+            while n in self.pending:
+                self.decoded.wait()
+            surface = self.surfaces.get(n)
+        if surface is None:
+            surface = self.decode(n)
+        return surface
+
+    def _run(self):
+        while True:
+            n = self.queue.get()
+            try:
+                surface = self.decode(n)
+            except (pygame.error, OSError) as e:
+                print(e)
+                surface = None
+
+            with self.lock:
+                self.pending.discard(n)
+                if surface is not None and self.wanted(n):  # not if the run moved on while decoding
+                    self.surfaces.setdefault(n, surface)
+                self.decoded.notify_all()
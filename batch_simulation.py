@@ -0,0 +1,202 @@
+"""
+NumPy version of simulation.step that advances many runs at once.
+
+Every field of SimState is stored as an array with one entry per run, and
+each phase of the step (floor scroll, player physics, spawning, mob
+movement and collision, scoring) is applied to all runs with vectorized
+operations. Given the same seeds and inputs the results match the scalar
+simulation exactly, so difficulty changes can be tuned here over millions
+of runs.
+
+It models the game's old hitboxes: sprite bounding boxes tested where
+each step ends (a SimState without hitboxes and not continuous). The game
+now plays with pixel masks and swept collision (Game.pixel_collision,
+Game.continuous_collision), which are not vectorized, so results here are
+for the old hitboxes; evaluation.py plays with the game's.
+"""
+
+import numpy as np
+
+import simulation as sim
+
+
+class BatchSimulation:
+    """ count independent runs of the game, stepped together """
+
+    def __init__(self, count, player_size, mob_sizes, hard=False, game_speed=None, seeds=None,
+                 level_points=sim.LEVEL_POINTS, speed_step=None, points_step=None):
+        """
+        Args:
+            count - int, number of runs
+            player_size - (width, height) of the player sprite
+            mob_sizes - dict {mob_type: (width, height)}
+            hard - bool, hard difficulty
+            game_speed - starting scroll speed, defaults to the difficulty's
+            seeds - int array of RNG seeds, defaults to 0..count-1
+            level_points, speed_step, points_step - difficulty curve overrides
+        """
+        self.count = count
+        self.hard = hard
+        self.level_points = level_points
+        if speed_step is None:
+            speed_step = sim.HARD_SPEED_STEP if hard else sim.EASY_SPEED_STEP
+        if points_step is None:
+            points_step = sim.HARD_POINTS_STEP if hard else sim.EASY_POINTS_STEP
+        self.speed_step = speed_step
+        self.points_step = points_step
+        if game_speed is None:
+            game_speed = sim.start_speed(hard)
+
+        # MOB SIZE LOOKUP, indexed by mob type
+        self.mob_widths = np.zeros(max(mob_sizes) + 1)
+        self.mob_heights = np.zeros(max(mob_sizes) + 1)
+        for mob_type, (width, height) in mob_sizes.items():
+            self.mob_widths[mob_type] = width
+            self.mob_heights[mob_type] = height
+        self.flying = np.zeros(len(self.mob_widths), dtype=bool)
+        self.flying[list(sim.FLYING_MOB_TYPES)] = True
+
+        # PLAYERS
+        self.player_width, self.player_height = player_size
+        self.player_x = np.full(count, float(sim.PLAYER_START_X - self.player_width // 2))
+        self.player_y = np.full(count, float(sim.FLOOR - self.player_height // 2))
+        self.player_vel_y = np.zeros(count)
+        self.player_jumping = np.ones(count, dtype=bool)
+        self.player_move_up = np.zeros(count, dtype=bool)
+        self.player_flip = np.zeros(count, dtype=bool)
+
+        # MOBS (at most one per run, as in the game)
+        self.mob_active = np.zeros(count, dtype=bool)
+        self.mob_type = np.zeros(count, dtype=np.int64)
+        self.mob_x = np.zeros(count)
+        self.mob_y = np.zeros(count)
+        self.mob_width = np.zeros(count)
+        self.mob_height = np.zeros(count)
+
+        # GAME
+        self.game_speed = np.full(count, float(game_speed))
+        self.points = np.zeros(count, dtype=np.int64)
+        self.level = np.ones(count, dtype=np.int64)
+        self.background = np.ones(count, dtype=np.int64)
+        self.floor_pos = np.zeros(count)
+        self.tick = np.zeros(count, dtype=np.int64)
+        self.over = np.zeros(count, dtype=bool)
+        self.death_cause = np.zeros(count, dtype=np.int64)  # 0 while alive
+
+        if seeds is None:
+            seeds = np.arange(count)
+        self.seed = np.asarray(seeds, dtype=np.uint64) & np.uint64(sim.RNG_MASK)
+
+    def random_range(self, where, start, stop):
+        """ Vectorized simulation.random_range, advancing only the seeds in where """
+        seed = (self.seed * np.uint64(sim.RNG_MULTIPLIER) + np.uint64(sim.RNG_INCREMENT)) & np.uint64(sim.RNG_MASK)
+        self.seed = np.where(where, seed, self.seed)
+        return start + ((seed >> np.uint64(16)) % np.uint64(stop - start)).astype(np.int64)
+
+    def move_players(self, alive, move_left, move_right, jump, move_down):
+        """ Vectorized simulation.move_player """
+        self.player_move_up |= jump & alive
+
+        left = alive & move_left & (self.player_x > 0)
+        right = alive & move_right & (self.player_x <= sim.PLAYER_MAX_X)
+        dx = np.where(right, sim.PLAYER_SPEED, np.where(left, -sim.PLAYER_SPEED, 0))
+        self.player_flip = np.where(right, False, np.where(left, True, self.player_flip))
+        dy = np.where(alive & move_down, float(sim.PLAYER_SPEED), 0.0)
+
+        do_jump = alive & self.player_move_up & ~self.player_jumping
+        self.player_vel_y = np.where(do_jump, float(sim.JUMP_VELOCITY), self.player_vel_y)
+        self.player_move_up &= ~do_jump
+        self.player_jumping |= do_jump
+
+        self.player_vel_y = np.where(alive, self.player_vel_y + sim.GRAVITY, self.player_vel_y)
+        dy = np.where(alive, dy + self.player_vel_y, 0.0)
+
+        bottom = self.player_y + self.player_height
+        land = alive & (bottom + dy > sim.FLOOR)
+        dy = np.where(land, sim.FLOOR - bottom, dy)
+        self.player_jumping &= ~land
+
+        self.player_x += dx
+        self.player_y += dy
+
+    def spawn_mobs(self, alive):
+        """ Vectorized simulation.spawn_mob for runs without a mob """
+        spawn = alive & ~self.mob_active
+        if not spawn.any():
+            return
+
+        mob_type = self.random_range(spawn, sim.MOB_TYPES.start, sim.MOB_TYPES.stop)
+        rand_height = self.random_range(spawn, *sim.FLYING_HEIGHT_RANGE)
+        width = self.mob_widths[mob_type]
+        height = self.mob_heights[mob_type]
+        y = np.where(self.flying[mob_type], height + rand_height, sim.FLOOR - height)
+
+        self.mob_type = np.where(spawn, mob_type, self.mob_type)
+        self.mob_x = np.where(spawn, float(sim.SCREEN_WIDTH), self.mob_x)
+        self.mob_y = np.where(spawn, y, self.mob_y)
+        self.mob_width = np.where(spawn, width, self.mob_width)
+        self.mob_height = np.where(spawn, height, self.mob_height)
+        self.mob_active |= spawn
+
+    def move_mobs(self, alive):
+        """ Vectorized simulation.move_mobs, returns the runs that just ended """
+        moving = alive & self.mob_active
+        self.mob_x = np.where(moving, self.mob_x - self.game_speed, self.mob_x)
+
+        # same test as simulation.collides (Rect.colliderect)
+        hit = moving & (
+            (self.player_x < self.mob_x + self.mob_width) & (self.mob_x < self.player_x + self.player_width)
+            & (self.player_y < self.mob_y + self.mob_height) & (self.mob_y < self.player_y + self.player_height)
+        )
+        self.over |= hit
+        self.death_cause = np.where(hit, self.mob_type, self.death_cause)
+        self.mob_active &= ~(moving & (self.mob_x <= -self.mob_width))
+        return hit
+
+    def score(self, scoring):
+        """ Vectorized simulation.score """
+        self.points += np.where(scoring, self.points_step, 0)
+
+        level_up = scoring & (self.points % self.level_points == 0)
+        self.level += level_up
+        self.background += level_up
+        self.game_speed = np.where(level_up, self.game_speed + self.speed_step, self.game_speed)
+
+        wrap = (self.level > sim.BACKGROUND_COUNT) & (self.background > sim.BACKGROUND_COUNT)
+        self.background = np.where(wrap, 1, self.background)
+
+    def step(self, move_left=False, move_right=False, jump=False, move_down=False):
+        """ Advances every unfinished run by one tick.
+            Inputs are bools or bool arrays with one entry per run.
+        """
+        alive = ~self.over
+        self.tick += alive
+
+        floor_pos = self.floor_pos - self.game_speed
+        floor_pos = np.where(floor_pos <= -sim.FLOOR_TILE_OFFSET, 0.0, floor_pos)
+        self.floor_pos = np.where(alive, floor_pos, self.floor_pos)
+
+        self.move_players(alive, move_left, move_right, jump, move_down)
+        self.spawn_mobs(alive)
+        hit = self.move_mobs(alive)
+        self.score(alive & ~hit)
+
+    def run(self, policy=None, max_steps=None):
+        """ Steps until every run is over (or max_steps)
+
+        Args:
+            policy - callable(batch) returning (move_left, move_right, jump, move_down)
+            max_steps - int or None
+        """
+        steps = 0
+        while not self.over.all() and (max_steps is None or steps < max_steps):
+            if policy is None:
+                self.step()
+            else:
+                self.step(*policy(self))
+            steps += 1
+        return self
+
+    def stats(self):
+        """ (levels, points) arrays, the batch form of Game.game_loop's result """
+        return self.level, self.points
@@ -0,0 +1,18 @@
+"""
+Reproducible benchmarks for the game loop, rendering, UI and database paths.
+
+Runs headless under the SDL dummy drivers with fixed seeds and writes the
+results as JSON. Every result is a rate (higher is better), and the best
+of several repeats is kept to keep noise down. Results slower than a
+stored baseline by more than the tolerance are flagged. The baseline
+holds absolute rates from one machine, and a run on a busy or different
+machine easily drifts past the tolerance, so the comparison is advisory
+unless --strict is given, e.g.
+
+    python -m benchmarks                           # run, compare with baseline.json
+    python -m benchmarks --only simulation,ui      # some suites only
+    python -m benchmarks --db-rows 1e3,1e5,1e7     # bigger leaderboard tables
+    python -m benchmarks --output results.json     # keep the results
+    python -m benchmarks --save-baseline           # make this run the new baseline
+    python -m benchmarks --strict                  # exit with 1 on a flagged result
+"""
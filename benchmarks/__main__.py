@@ -0,0 +1,78 @@
+import argparse
+import os
+import sys
+
+# HEADLESS: must be set before pygame opens anything
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from benchmarks import harness
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+SUITES = ('simulation', 'rendering', 'ui', 'database')
+
+
+def run_suite(name, scale, db_rows):
+    # suites are imported on demand so --only database never touches pygame's display
+    if name == 'simulation':
+        from benchmarks import bench_simulation
+        return bench_simulation.run(scale)
+    if name == 'rendering':
+        from benchmarks import bench_rendering
+        return bench_rendering.run(scale)
+    if name == 'ui':
+        from benchmarks import bench_ui
+        return bench_ui.run(scale)
+    from benchmarks import bench_database
+    return bench_database.run(scale, db_rows)
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Headless performance benchmarks')
+    parser.add_argument('--only', default=','.join(SUITES), help=f"comma separated, from {', '.join(SUITES)}")
+    parser.add_argument('--db-rows', default='1e3,1e4,1e5', help='table sizes for the database suite')
+    parser.add_argument('--quick', action='store_true', help='a tenth of the iterations, for a smoke run')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', default=BASELINE_FILE)
+    parser.add_argument('--save-baseline', action='store_true', help='write the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=harness.TOLERANCE,
+                        help='fraction slower than the baseline that gets flagged')
+    parser.add_argument('--strict', action='store_true',
+                        help='exit with 1 when a result is flagged, for a stable machine with its own baseline')
+    args = parser.parse_args()
+
+    suites = [name.strip() for name in args.only.split(',') if name.strip()]
+    for name in suites:
+        if name not in SUITES:
+            parser.error(f'unknown suite {name}')
+    db_rows = [int(float(rows)) for rows in args.db_rows.split(',')]
+    scale = 0.1 if args.quick else 1.0
+
+    if args.output:
+        args.output = os.path.abspath(args.output)
+    args.baseline = os.path.abspath(args.baseline)
+    # THE GAME LOADS ITS ASSETS RELATIVE TO THE REPOSITORY ROOT
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    results = []
+    for name in suites:
+        print(f'running {name}...')
+        results += run_suite(name, scale, db_rows)
+    harness.print_results(results)
+
+    if args.output:
+        harness.save(args.output, results)
+    if args.save_baseline:
+        harness.save(args.baseline, results)
+        print(f'baseline written to {args.baseline}')
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f'no baseline at {args.baseline}, run with --save-baseline to create one')
+        return 0
+
+    rows = harness.compare(results, harness.load(args.baseline), args.tolerance)
+    harness.print_comparison(rows, args.tolerance)
+    return 1 if args.strict and any(row[4] for row in rows) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+""" Score saving and leaderboard queries against tables of different sizes """
+
+import os
+import random
+import tempfile
+from itertools import cycle
+
+import db_configurations as db
+
+from benchmarks.harness import measure, result
+
+# SETTINGS
+SEED = 12345
+ROW_COUNTS = (10 ** 3, 10 ** 4, 10 ** 5)  # --db-rows goes up to 10^7
+FILL_CHUNK = 100000
+INSERTS = 200
+BATCH = 1000
+QUERIES = 500
+NAMES = 5000  # distinct player names in the filled table
+
+
+def _records(rng, count):
+    for _ in range(count):
+        yield (f'player{rng.randrange(NAMES)}', rng.randint(1, 20), rng.randrange(15000),
+               db.HARD if rng.random() < 0.3 else db.EASY)
+
+def fill(conn, rows, rng):
+    """ Adds rows random games, in chunks so 10^7 rows don't sit in memory """
+    while rows > 0:
+        count = min(rows, FILL_CHUNK)
+        with conn:
+            conn.executemany('INSERT INTO game_records(player_name, level, score, difficulty) '
+                             'VALUES(?, ?, ?, ?)', _records(rng, count))
+        rows -= count
+
+def open_database(path, rows):
+    """ A database like a long-running station's, with rows scores in it """
+    conn = db.create_connection(path)
+    db.create_table(conn, db.create_table_sql)
+    db.migrate(conn)
+    fill(conn, rows, random.Random(SEED))
+    conn.execute('ANALYZE')
+    return conn
+
+def run(scale=1.0, row_counts=ROW_COUNTS):
+    results = []
+    rng = random.Random(SEED)
+    inserts = max(1, int(INSERTS * scale))
+    queries = max(1, int(QUERIES * scale))
+
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in row_counts:
+            conn = open_database(os.path.join(directory, f'bench_{rows}.db'), rows)
+            prefix = f'db.{rows}'
+
+            record = cycle(list(_records(rng, inserts)))
+            batch = list(_records(rng, BATCH))
+
+            rate = measure(lambda: db.insert_score(conn, next(record)), inserts)
+            results.append(result(f'{prefix}.insert_score', rate, 'rows/s'))
+
+            rate = measure(lambda: db.insert_scores(conn, batch), 1)
+            results.append(result(f'{prefix}.insert_scores', rate * BATCH, 'rows/s'))
+
+            results.append(result(f'{prefix}.query_scores',
+                                  measure(lambda: db.query_scores(conn), queries), 'queries/s'))
+            results.append(result(f'{prefix}.query_scores.hard',
+                                  measure(lambda: db.query_scores(conn, difficulty=db.HARD), queries), 'queries/s'))
+
+            # A PAGE HALFWAY DOWN THE LEADERBOARD
+            middle = conn.execute('SELECT id, player_name, level, score FROM game_records '
+                                  'ORDER BY score DESC, id DESC LIMIT 1 OFFSET ?', (rows // 2,)).fetchone()
+            after = db.page_key(middle)
+            results.append(result(f'{prefix}.query_scores_page.deep',
+                                  measure(lambda: db.query_scores_page(conn, 10, after), queries), 'queries/s'))
+
+            results.append(result(f'{prefix}.query_player_rank',
+                                  measure(lambda: db.query_player_rank(conn, 'player42'), queries), 'queries/s'))
+            conn.close()
+
+    return results
@@ -0,0 +1,81 @@
+""" Game.game_loop frame cost (one simulation step plus a render) with the real assets """
+
+import pygame
+
+import asset_manager as assets
+import display_backend
+import jump_game as jg
+import simulation as sim
+from dirty_renderer import DirtyRenderer
+from evaluation import JumpOverPolicy
+
+from benchmarks.harness import measure, result
+
+# SETTINGS
+SEED = 12345
+FRAMES = 600
+
+
+def open_display():
+    """ The dummy-driver window every suite drawing with the game's code needs """
+    if jg.Game.SCREEN is None:
+        pygame.display.init()
+        pygame.font.init()
+        pygame.freetype.init()
+        jg.Game.DISPLAY = display_backend.open_display(jg.Game.SCREEN_RESOLUTION, 'software')
+        jg.Game.SCREEN = jg.Game.DISPLAY.surface
+        assets.preload_images()
+    return jg.Game.SCREEN
+
+def _frame(game, renderer):
+    """ Returns a callable doing the work of one game_loop iteration """
+    policy = JumpOverPolicy()
+    start = sim.new_game(*assets.sprite_sizes(game.player.char_type), seed=SEED)
+
+    def reset():
+        game.state = start.copy()
+        game.release_views(keep_alive=False)
+        game.snapshot()
+
+    def frame():
+        if game.state.over:
+            reset()
+        game.jump = policy.act(game.state).jump
+        game.step()
+        game.render(renderer, 0.5)
+
+    return frame, reset
+
+def run(scale=1.0):
+    screen = open_display()
+    frames = max(1, int(FRAMES * scale))
+    results = []
+
+    for dirty in (False, True):
+        game = jg.Game(jg.Player(1))
+        renderer = DirtyRenderer(screen, assets.floor_image(), jg.Game.FLOOR) if dirty else None
+        frame, reset = _frame(game, renderer)
+        rate = measure(frame, frames, setup=reset)
+        results.append(result(f"game_loop.frame.{'dirty' if dirty else 'full'}", rate, 'frames/s'))
+
+        game.reset()
+
+    # TEXTURES THROUGH AN SDL RENDERER (ITS SOFTWARE DRIVER UNDER THE DUMMY VIDEO DRIVER)
+    try:
+        gpu_display = display_backend.RendererDisplay(jg.Game.SCREEN_RESOLUTION, accelerated=-1)
+    except (ImportError, RuntimeError) as e:
+        print(f'no SDL renderer ({e}), skipping game_loop.frame.renderer')
+        return results
+
+    software_display = jg.Game.DISPLAY
+    jg.Game.DISPLAY = gpu_display
+    try:
+        game = jg.Game(jg.Player(1))
+        frame, reset = _frame(game, None)
+        results.append(result('game_loop.frame.renderer', measure(frame, frames, setup=reset), 'frames/s'))
+        game.reset()
+    finally:
+        jg.Game.DISPLAY = software_display
+        gpu_display.close()
+
+    return results
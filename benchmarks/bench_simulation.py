@@ -0,0 +1,89 @@
+""" Simulation throughput (what Player.move / Mob.update became, see simulation.py) """
+
+import asset_manager as assets
+import simulation as sim
+from evaluation import JumpOverPolicy
+
+from benchmarks.harness import measure, result
+
+# SETTINGS
+SEED = 12345
+PLAYER_TYPE = 1
+STEPS = 20000
+BATCH_RUNS = 4096
+BATCH_STEPS = 200
+CROWD_SIZES = (16, 256)
+
+
+def _stepper(sizes, hard, max_mobs=sim.MAX_MOBS, spawn_interval=sim.SPAWN_INTERVAL, hitboxes=None,
+             continuous=False):
+    """ Returns a callable doing one step, restarting the run when it ends """
+    policy = JumpOverPolicy()
+    start = sim.new_game(*sizes, hard=hard, seed=SEED, max_mobs=max_mobs, spawn_interval=spawn_interval,
+                         hitboxes=hitboxes, continuous=continuous)
+    games = [start.copy()]
+
+    def step():
+        state = games[0]
+        if state.over:
+            state = games[0] = start.copy()
+        sim.step(state, policy.act(state))
+
+    def reset():
+        games[0] = start.copy()
+
+    return step, reset
+
+def _crowded(sizes, count):
+    """ A state with count mobs spread to the right of the player, none touching it """
+    state = sim.new_game(*sizes, seed=SEED, max_mobs=count)
+    width, height = state.mob_sizes[1]
+    left = state.player.x + state.player.width + 1
+    for i in range(count):
+        x = left + i * (sim.SCREEN_WIDTH - left) / count
+        state.mobs.append(sim.MobBody(i, 1, x, sim.FLOOR - height, width, height))
+    return state
+
+def run(scale=1.0):
+    sizes = assets.sprite_sizes(PLAYER_TYPE)
+    steps = max(1, int(STEPS * scale))
+    results = []
+
+    for hard in (False, True):
+        step, reset = _stepper(sizes, hard)
+        rate = measure(step, steps, setup=reset)
+        results.append(result(f"simulation.step.{'hard' if hard else 'easy'}", rate, 'steps/s'))
+
+    step, reset = _stepper(sizes, False, sim.DENSE_MAX_MOBS, sim.DENSE_SPAWN_INTERVAL)
+    results.append(result('simulation.step.dense', measure(step, steps, setup=reset), 'steps/s'))
+
+    # PIXEL HITBOXES: THE MASK TEST ONLY RUNS BEHIND THE RECT TEST
+    step, reset = _stepper(sizes, False, hitboxes=sim.Hitboxes(*assets.sprite_masks(PLAYER_TYPE)))
+    results.append(result('simulation.step.pixel', measure(step, steps, setup=reset), 'steps/s'))
+
+    # SWEPT: THE TIME OF IMPACT ONLY RUNS FOR MOBS IN THE WIDENED BROAD PHASE
+    step, reset = _stepper(sizes, True, continuous=True)
+    results.append(result('simulation.step.swept', measure(step, steps, setup=reset), 'steps/s'))
+
+    # BROAD PHASE: COST SHOULD NOT GROW WITH THE MOB COUNT
+    for count in CROWD_SIZES:
+        state = _crowded(sizes, count)
+        rate = measure(lambda: sim.check_collisions(state), steps)
+        results.append(result(f'simulation.check_collisions.{count}_mobs', rate, 'checks/s'))
+
+    try:
+        from batch_simulation import BatchSimulation
+    except ImportError:
+        print('numpy is not installed, skipping batch_simulation')
+        return results
+
+    player_size, mob_sizes = sizes
+    batch_steps = max(1, int(BATCH_STEPS * scale))
+    batches = []
+
+    def new_batch():
+        batches[:] = [BatchSimulation(BATCH_RUNS, player_size, mob_sizes, seeds=range(SEED, SEED + BATCH_RUNS))]
+
+    rate = measure(lambda: batches[0].step(), batch_steps, setup=new_batch)
+    results.append(result('batch_simulation.step', rate * BATCH_RUNS, 'run-steps/s'))
+    return results
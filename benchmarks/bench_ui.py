@@ -0,0 +1,68 @@
+""" Menu widgets and the name entry box """
+
+import pygame
+
+import font_cache as fonts
+import jump_game as jg
+from pygame_textinput import TextInput
+
+from benchmarks.bench_rendering import open_display
+from benchmarks.harness import measure, result
+
+# SETTINGS
+WIDGETS = 500
+KEYSTROKES = 2000
+NAME = 'benchmark!'
+
+
+def _new_button():
+    return jg.UIElement(center_position=(375, 250), font_size=30, bg_rgb=jg.BLUE,
+                        text_rgb=jg.WHITE, text='Start', action=jg.GameState.NEWGAME)
+
+def _keystroke(key, unicode):
+    """ Press and release, so TextInput never starts repeating the key """
+    return [pygame.event.Event(pygame.KEYDOWN, key=key, unicode=unicode),
+            pygame.event.Event(pygame.KEYUP, key=key)]
+
+def _typing_events():
+    """ Types NAME then erases it, one keystroke per update call as in play_game """
+    keystrokes = [_keystroke(ord(char), char) for char in NAME]
+    keystrokes += [_keystroke(pygame.K_BACKSPACE, '\b')] * len(NAME)
+    return keystrokes
+
+def run(scale=1.0):
+    open_display()
+    widgets = max(1, int(WIDGETS * scale))
+    results = []
+
+    # WARM: the text cache already holds the surfaces, as after the first menu visit
+    _new_button()
+    results.append(result('ui.UIElement.warm', measure(_new_button, widgets), 'widgets/s'))
+    results.append(result('ui.UIElement.cold',
+                          measure(lambda: (fonts.clear_text_cache(), jg.BUTTON_ATLAS.clear(), _new_button()), widgets),
+                          'widgets/s'))
+
+    def render():
+        jg.create_surface_with_text('Return to main menu', 20, jg.WHITE, jg.BLUE)
+
+    render()
+    results.append(result('ui.create_surface_with_text.warm', measure(render, widgets * 10), 'surfaces/s'))
+    results.append(result('ui.create_surface_with_text.cold', measure(lambda: (fonts.clear_text_cache(), render()), widgets),
+                          'surfaces/s'))
+
+    # TEXT INPUT
+    text_input = TextInput(text_color=jg.WHITE, cursor_color=jg.WHITE)
+    events = _typing_events()
+    count = max(1, int(KEYSTROKES * scale))
+    position = [0]
+
+    def update():
+        text_input.update(events[position[0] % len(events)])
+        position[0] += 1
+
+    results.append(result('ui.TextInput.update', measure(update, count), 'keystrokes/s'))
+
+    # IDLE: what the name entry costs on every frame nothing is typed
+    text_input.update(events[0])
+    results.append(result('ui.TextInput.update.idle', measure(lambda: text_input.update([]), count * 10), 'updates/s'))
+    return results
@@ -0,0 +1,85 @@
+import json
+import platform
+import time
+from datetime import datetime, timezone
+
+# DEFAULTS
+REPEAT = 5  # timed repeats per benchmark, the fastest one is kept
+TOLERANCE = 0.25  # slowdown against the baseline that gets flagged
+
+
+# MEASURING
+def measure(fn, number, repeat=REPEAT, setup=None):
+    """ Calls fn number times per repeat and returns the best rate in calls per second
+
+    Args:
+        fn - callable taking no arguments
+        number - int, calls per repeat
+        setup - optional callable run (untimed) before every repeat
+    """
+    best = None
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return number / max(best, 1e-9)
+
+def result(name, value, unit):
+    """ One benchmark result, value is a rate so higher is always better """
+    return {'name': name, 'value': value, 'unit': unit}
+
+
+# RESULT FILES
+def environment():
+    import pygame
+    return {
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'sdl': '.'.join(str(n) for n in pygame.get_sdl_version()),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    }
+
+def save(path, results):
+    with open(path, 'w') as f:
+        json.dump({'environment': environment(), 'results': results}, f, indent=2)
+        f.write('\n')
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+# BASELINE COMPARISON
+def compare(results, baseline, tolerance=TOLERANCE):
+    """ Returns [(name, value, baseline value, ratio, regressed)] for results in the baseline """
+    previous = {row['name']: row['value'] for row in baseline['results']}
+    rows = []
+    for row in results:
+        if row['name'] not in previous:
+            continue
+        base = previous[row['name']]
+        ratio = row['value'] / base if base else float('inf')
+        rows.append((row['name'], row['value'], base, ratio, ratio < 1 - tolerance))
+    return rows
+
+def print_results(results):
+    for row in results:
+        print(f"{row['name']:48} {row['value']:14,.1f} {row['unit']}")
+
+def print_comparison(rows, tolerance=TOLERANCE):
+    print(f"\n{'benchmark':48} {'baseline':>14} {'now':>14} {'change':>8}")
+    for name, value, base, ratio, regressed in rows:
+        flag = '  SLOWER' if regressed else ''
+        print(f'{name:48} {base:14,.1f} {value:14,.1f} {ratio - 1:+8.1%}{flag}')
+
+    regressions = sum(1 for row in rows if row[4])
+    print(f'\n{regressions} result(s) slower than the baseline by more than {tolerance:.0%}')
+    if regressions:
+        print('(absolute rates from one machine: compare with a run of the parent commit before calling it a regression)')
@@ -0,0 +1,46 @@
+"""
+Broad-phase collision for many entities.
+
+Instead of testing every entity against the player, only the ones whose
+horizontal extent can overlap are handed to the exact test. Entities are
+anything with x, y, width and height (the simulation's bodies).
+
+Mobs all spawn at the right edge and scroll at the same speed, so the
+simulation's mob list is always ordered by x. The bisect helpers rely on
+that to find candidates in O(log n), with no per-tick rebuild.
+"""
+
+
+def bisect_left_x(bodies, x):
+    """ Index of the first body with body.x >= x, bodies sorted by x """
+    lo, hi = 0, len(bodies)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if bodies[mid].x < x:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+def bisect_right_x(bodies, x):
+    """ Index of the first body with body.x > x, bodies sorted by x """
+    lo, hi = 0, len(bodies)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if bodies[mid].x <= x:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+def candidates(bodies, body, max_width, sweep=0):
+    """ The slice of x-sorted bodies whose x-range can overlap body's
+
+    Args:
+        max_width - widest entity in bodies, bounds how far left an overlapping one can start
+        sweep - how much further right of body the bodies were at the start of the step
+                (negative for left), to also find those that only overlapped during it
+    """
+    start = bisect_left_x(bodies, body.x - max_width - max(sweep, 0))
+    stop = bisect_left_x(bodies, body.x + body.width - min(sweep, 0))
+    return bodies[start:stop]
@@ -1,6 +1,13 @@
 import sqlite3
 from sqlite3 import Error
 
+# CONNECTION SETTINGS
+BUSY_TIMEOUT_MS = 5000  # how long to wait for another station's write lock
+
+# DIFFICULTIES
+EASY = 'easy'
+HARD = 'hard'
+
 # CREATE TABLE
 def create_table(conn, create_table_sql):
     try:
@@ -9,36 +16,158 @@ def create_table(conn, create_table_sql):
     except Error as e:
         print(e)
 
+# SCHEMA MIGRATIONS (PRAGMA user_version is the number already applied)
+MIGRATIONS = [
+    f"ALTER TABLE game_records ADD COLUMN difficulty TEXT NOT NULL DEFAULT '{EASY}'",
+    "CREATE INDEX IF NOT EXISTS idx_game_records_score ON game_records(score)",
+    "CREATE INDEX IF NOT EXISTS idx_game_records_level_score ON game_records(level, score)",
+    "CREATE INDEX IF NOT EXISTS idx_game_records_player_name_score ON game_records(player_name, score)",
+    "CREATE INDEX IF NOT EXISTS idx_game_records_difficulty_score ON game_records(difficulty, score)",
+]
+
+def migrate(conn):
+    """ Applies the migrations this database has not seen yet """
+    try:
+        # BEGIN IMMEDIATE so two stations can't migrate the same file at once
+        conn.execute("BEGIN IMMEDIATE")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for sql in MIGRATIONS[version:]:
+            conn.execute(sql)
+        conn.execute(f"PRAGMA user_version = {len(MIGRATIONS)}")
+        conn.commit()
+    except Error as e:
+        conn.rollback()
+        print(e)
+
+# TUNE CONNECTION
+def configure_connection(conn):
+    """ WAL lets readers and the writer work concurrently, and with it
+        synchronous=NORMAL only fsyncs at checkpoints instead of every commit
+    """
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+
 # CREATE CONNECTION TO DATABASE
 def create_connection(db_file):
     """ create a database connection to a SQLite database """
     conn = None
     try:
         conn = sqlite3.connect(db_file)
+        configure_connection(conn)
         print(sqlite3.version)
     except Error as e:
         print(e)
-    
+
     return conn
 
 # INSERT
+def _insert_sql(record):
+    """ Records are (player_name, level, score) or (player_name, level, score, difficulty) """
+    if len(record) == 4:
+        return '''INSERT INTO game_records(player_name, level, score, difficulty)
+                  VALUES(?, ?, ?, ?)'''
+    return '''INSERT INTO game_records(player_name, level, score)
+              VALUES(?, ?, ?)'''
+
 def insert_score(conn, record):
-    sql = '''INSERT INTO game_records(player_name, level, score)
-             VALUES(?, ?, ?)'''
     cur = conn.cursor()
-    cur.execute(sql, record)
+    cur.execute(_insert_sql(record), record)
     conn.commit()
 
     return cur.lastrowid
 
+# INSERT MANY (ONE TRANSACTION)
+def insert_scores(conn, records):
+    """ Inserts records with a single commit, returns [(id, record)] """
+    inserted = []
+    with conn:
+        cur = conn.cursor()
+        for record in records:
+            cur.execute(_insert_sql(record), record)
+            inserted.append((cur.lastrowid, record))
+
+    return inserted
+
 # SELECT / VIEW
-def query_scores(conn):
+def _filters(difficulty=None, level=None):
+    """ Returns (WHERE conditions, parameters) """
+    conditions = []
+    params = []
+    if difficulty is not None:
+        conditions.append("difficulty = ?")
+        params.append(difficulty)
+    if level is not None:
+        conditions.append("level = ?")
+        params.append(level)
+    return conditions, params
+
+def query_scores(conn, limit=10, difficulty=None, level=None):
+    """ Top scores, optionally of one difficulty or one level """
+    conditions, params = _filters(difficulty, level)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    cur = conn.cursor()
+    cur.execute(f"SELECT player_name, level, score FROM game_records {where} "
+                f"ORDER BY score DESC LIMIT ?", params + [limit])
+    rows = cur.fetchall()
+
+    return rows
+
+def query_scores_page(conn, limit=10, after=None, difficulty=None, level=None):
+    """ One page of the leaderboard, ordered by score then newest first.
+
+        Uses keyset pagination: after is the (score, id) of the last row of
+        the previous page, so every page is an index range scan no matter
+        how deep it is. Rows are (id, player_name, level, score).
+    """
+    conditions, params = _filters(difficulty, level)
+    if after is not None:
+        # row value, so SQLite turns it into a range on the score index
+        conditions.append("(score, id) < (?, ?)")
+        params += [after[0], after[1]]
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
     cur = conn.cursor()
-    cur.execute("SELECT player_name, level, score FROM game_records ORDER BY score DESC LIMIT 10")
+    cur.execute(f"SELECT id, player_name, level, score FROM game_records {where} "
+                f"ORDER BY score DESC, id DESC LIMIT ?", params + [limit])
     rows = cur.fetchall()
 
     return rows
 
+def query_data_version(conn):
+    """ Changes whenever another connection commits to the database """
+    return conn.execute("PRAGMA data_version").fetchone()[0]
+
+def page_key(row):
+    """ The after argument of query_scores_page for the page following row """
+    return (row[3], row[0])
+
+def query_player_best(conn, player_name, difficulty=None):
+    """ (level, score) of the player's best game, None if they never played """
+    conditions, params = _filters(difficulty)
+    conditions.insert(0, "player_name = ?")
+    params.insert(0, player_name)
+
+    cur = conn.cursor()
+    cur.execute(f"SELECT level, score FROM game_records WHERE {' AND '.join(conditions)} "
+                f"ORDER BY score DESC LIMIT 1", params)
+    return cur.fetchone()
+
+def query_player_rank(conn, player_name, difficulty=None):
+    """ 1-based leaderboard position of the player's best score, None if they never played """
+    best = query_player_best(conn, player_name, difficulty)
+    if best is None:
+        return None
+
+    conditions, params = _filters(difficulty)
+    conditions.append("score > ?")
+    params.append(best[1])
+
+    cur = conn.cursor()
+    cur.execute(f"SELECT COUNT(*) FROM game_records WHERE {' AND '.join(conditions)}", params)
+    return cur.fetchone()[0] + 1
+
 db_file = r"game.db"
 create_table_sql = """CREATE TABLE IF NOT EXISTS game_records (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
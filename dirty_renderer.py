@@ -0,0 +1,158 @@
+import pygame
+from pygame.sprite import DirtySprite, LayeredDirty
+
+# LAYERS
+FLOOR_LAYER = 0
+ENTITY_LAYER = 1
+HUD_LAYER = 2
+
+
+class EntitySprite(DirtySprite):
+    """ Mirrors a game entity (Player, Mob) and is only redrawn when it moves.
+        Entities are drawn from a sprite atlas: image is the page, area the part of it to show.
+    """
+
+    def __init__(self, entity):
+        super().__init__()
+        self.entity = entity
+        self.image = entity.image
+        self.source_rect = entity.area
+        self.rect = entity.rect.copy()
+        self.frame = 0  # last frame the entity was on screen
+        self.dirty = 1
+
+    def sync(self):
+        image = self.entity.image
+        area = self.entity.area
+        rect = self.entity.rect
+        if image is not self.image or area is not self.source_rect or rect != self.rect:
+            self.image = image
+            self.source_rect = area
+            self.rect.update(rect)  # in place, LayeredDirty keeps its own copy of the old one
+            self.dirty = 1
+
+
+class FloorSprite(DirtySprite):
+    """ Scrolling floor drawn as a window (source_rect) into a pre-tiled strip """
+
+    def __init__(self, floor_surface, top, tile_offset=500):
+        super().__init__()
+        width, height = floor_surface.get_size()
+
+        # same layout as Game.draw_background: one tile at x and one at x + 500
+        self.image = pygame.Surface((width + tile_offset, height)).convert()
+        self.image.blit(floor_surface, (0, 0))
+        self.image.blit(floor_surface, (tile_offset, 0))
+
+        self.rect = pygame.Rect(0, top, width, height)
+        self.source_rect = pygame.Rect(0, 0, width, height)
+        self.dirty = 1
+
+    def scroll(self, floor_pos):
+        x = -round(floor_pos)  # rounded as Game.draw_background does
+        if x != self.source_rect.x:
+            self.source_rect.x = x
+            self.dirty = 1
+
+
+class TextSprite(DirtySprite):
+    """ HUD text positioned by its center, redrawn only when the text changes """
+
+    def __init__(self, center):
+        super().__init__()
+        self.center = center
+        self.image = pygame.Surface((0, 0))
+        self.rect = self.image.get_rect(center=center)
+
+    def set_surface(self, surface):
+        if surface is not self.image:
+            self.image = surface
+            self.rect = surface.get_rect(center=self.center)
+            self.dirty = 1
+
+
+class DirtyRenderer:
+    """ Renders the game loop with LayeredDirty and updates only changed rects.
+
+        The background is redrawn in full only when the level (background)
+        changes; otherwise just the floor strip, moving entities and changed
+        HUD text are passed to pygame.display.update.
+    """
+
+    def __init__(self, screen, floor_surface, floor_top):
+        self.screen = screen
+        self.group = LayeredDirty()
+        self.background_key = None
+
+        self.floor = FloorSprite(floor_surface, floor_top)
+        self.group.add(self.floor, layer=FLOOR_LAYER)
+
+        self.entity_sprites = {}  # entity -> EntitySprite, hidden while the entity is off screen
+        self.hud_sprites = {}     # center -> TextSprite
+        self.frame = 0
+
+    def set_background(self, key, surface):
+        """ Swaps the static background and forces a full redraw """
+        background = pygame.Surface(self.screen.get_size()).convert()
+        background.fill((0, 0, 0))
+        background.blit(surface, (0, 0))
+
+        self.background_key = key
+        self.group.clear(self.screen, background)
+        self.group.repaint_rect(self.screen.get_rect())
+
+    def invalidate(self):
+        """ Forces a full redraw next frame, after something else drew over the screen (a menu) """
+        self.background_key = None
+
+    def sync_entities(self, entities):
+        """ Shows the sprites of entities and hides those of entities that are gone.
+            The game recycles its entities, so hidden sprites are kept for when they return.
+        """
+        self.frame += 1
+        for entity in entities:
+            sprite = self.entity_sprites.get(entity)
+            if sprite is None:
+                sprite = EntitySprite(entity)
+                self.entity_sprites[entity] = sprite
+                self.group.add(sprite, layer=ENTITY_LAYER)
+            elif not sprite.visible:
+                sprite.visible = 1
+                sprite.dirty = 1
+            sprite.frame = self.frame
+            sprite.sync()
+
+        for sprite in self.entity_sprites.values():
+            if sprite.visible and sprite.frame != self.frame:
+                sprite.visible = 0
+                sprite.dirty = 1
+
+    def sync_hud(self, texts):
+        """ texts - list of (surface, center) """
+        for surface, center in texts:
+            sprite = self.hud_sprites.get(center)
+            if sprite is None:
+                sprite = TextSprite(center)
+                self.hud_sprites[center] = sprite
+                self.group.add(sprite, layer=HUD_LAYER)
+            sprite.set_surface(surface)
+
+    def render(self, background_key, background_surface, floor_pos, entities, hud_texts, overlay=None):
+        """ Draws a frame and pushes only the changed regions to the display.
+            overlay - optional callable(screen) drawing on top, returning the rect it drew or None
+        """
+        if background_key != self.background_key:
+            self.set_background(background_key, background_surface)
+
+        self.floor.scroll(floor_pos)
+        self.sync_entities(entities)
+        self.sync_hud(hud_texts)
+
+        rects = self.group.draw(self.screen)
+        if overlay is not None:
+            rect = overlay(self.screen)
+            if rect is not None:
+                # painted outside the group, so have it cleared again next frame
+                rects.append(rect)
+                self.group.repaint_rect(rect)
+        pygame.display.update(rects)
@@ -0,0 +1,181 @@
+"""
+Display backends.
+
+The game draws at one logical resolution (750x500) whatever the window
+size. How frames reach the window depends on the backend:
+
+- RendererDisplay: an SDL Renderer (pygame._sdl2.video). Images are
+  uploaded to textures once and drawn by the GPU, which also scales the
+  logical resolution up to the window. Menus, still drawn in software
+  onto the canvas surface, are uploaded as one streaming texture when
+  they change.
+- SoftwareDisplay: pygame.display.set_mode, as before. A window scale
+  above 1 opens it with pygame.SCALED, so SDL stretches the finished
+  frame and the blits stay those of 750x500 (SDL picks the largest whole
+  multiple that fits the desktop).
+
+open_display tries the renderer and falls back to software when
+pygame._sdl2 is missing or no accelerated driver exists (the dummy
+driver in CI, headless Linux).
+
+Environment:
+    DODGE_RENDERER=auto|software - backend, auto (default) prefers the GPU
+    DODGE_WINDOW_SCALE=2 - window size as a multiple of the logical resolution
+"""
+
+import os
+from collections import OrderedDict
+
+import pygame
+
+# DEFAULTS
+MAX_TEXTURES = 256  # eviction bound of the uploaded texture cache
+
+
+class SoftwareDisplay:
+    """ The display surface from pygame.display.set_mode """
+
+    gpu = False
+
+    def __init__(self, resolution, scale=1):
+        flags = pygame.SCALED if scale > 1 else 0
+        self.surface = pygame.display.set_mode(resolution, flags)
+
+    def set_caption(self, title, icon):
+        pygame.display.set_caption(title)
+        pygame.display.set_icon(icon)
+
+    def mouse_pos(self):
+        return pygame.mouse.get_pos()  # SCALED already maps it to the logical resolution
+
+    def fill(self, color):
+        self.surface.fill(color)
+
+    def blit(self, image, dest, area=None):
+        self.surface.blit(image, dest, area)
+
+    def forget(self, image):
+        pass  # nothing uploaded
+
+    def show_canvas(self, rect):
+        pass  # the canvas is the display surface
+
+    def present(self, rects=None):
+        """ Shows what was drawn on the canvas (surface), all of it or only rects """
+        if rects is None:
+            pygame.display.flip()
+        else:
+            pygame.display.update(rects)
+
+    def present_frame(self):
+        """ Shows what was drawn with fill and blit """
+        pygame.display.update()
+
+    def close(self):
+        pass
+
+
+class RendererDisplay:
+    """ An SDL Renderer drawing uploaded textures """
+
+    gpu = True
+
+    def __init__(self, resolution, scale=1, accelerated=1):
+        """
+        Args:
+            resolution - tuple (width, height), logical size everything is drawn at
+            scale - window size as a multiple of resolution
+            accelerated - 1 to require a GPU driver, -1 to take any (the software one in tests)
+        """
+        from pygame._sdl2.video import Window, Renderer, Texture
+
+        self.scale = scale
+        self.window = Window(size=(round(resolution[0] * scale), round(resolution[1] * scale)))
+        try:
+            self.renderer = Renderer(self.window, accelerated=accelerated)
+        except RuntimeError:  # pygame._sdl2's error, pygame.error derives from it too
+            self.window.destroy()
+            raise
+        self.renderer.logical_size = resolution
+
+        # MENUS AND OVERLAYS ARE DRAWN IN SOFTWARE ONTO surface, THEN UPLOADED
+        self.surface = pygame.Surface(resolution)
+        self.canvas = Texture(self.renderer, resolution, streaming=True)
+
+        self.new_texture = Texture.from_surface
+        self.textures = OrderedDict()  # Surface -> Texture, least recently used first
+
+    def texture(self, image):
+        """ The texture of a surface, uploaded on first use.
+            Surfaces are treated as immutable, like the shared ones of the caches.
+        """
+        texture = self.textures.get(image)
+        if texture is not None:
+            self.textures.move_to_end(image)
+            return texture
+
+        texture = self.textures[image] = self.new_texture(self.renderer, image)
+        if len(self.textures) > MAX_TEXTURES:
+            self.textures.popitem(last=False)
+        return texture
+
+    def forget(self, image):
+        """ Drops the texture of a surface that was drawn onto since its upload """
+        self.textures.pop(image, None)
+
+    def set_caption(self, title, icon):
+        self.window.title = title
+        self.window.set_icon(icon)
+
+    def mouse_pos(self):
+        x, y = pygame.mouse.get_pos()
+        return int(x / self.scale), int(y / self.scale)
+
+    def fill(self, color):
+        self.renderer.draw_color = pygame.Color(color)
+        self.renderer.clear()
+
+    def blit(self, image, dest, area=None):
+        if area is None:
+            area = image.get_rect()
+        self.texture(image).draw(area, pygame.Rect(dest[0], dest[1], area.width, area.height))
+
+    def show_canvas(self, rect):
+        """ Draws part of the software canvas over the frame """
+        rect = rect.clip(self.surface.get_rect())
+        self.canvas.update(self.surface.subsurface(rect), rect)
+        self.canvas.draw(rect, rect)
+
+    def present(self, rects=None):
+        self.canvas.update(self.surface)
+        self.renderer.clear()
+        self.canvas.draw()
+        self.renderer.present()
+
+    def present_frame(self):
+        self.renderer.present()
+
+    def close(self):
+        self.textures.clear()
+        self.window.destroy()
+
+
+def open_display(resolution, backend=None, scale=None, environ=os.environ):
+    """ Opens the window with the requested backend, falling back to software
+
+    Args:
+        backend - 'auto' or 'software', default DODGE_RENDERER
+        scale - window size as a multiple of resolution, default DODGE_WINDOW_SCALE
+    """
+    if backend is None:
+        backend = environ.get('DODGE_RENDERER', 'auto')
+    if scale is None:
+        scale = float(environ.get('DODGE_WINDOW_SCALE', 1))
+
+    if backend != 'software':
+        try:
+            return RendererDisplay(resolution, scale)
+        except (ImportError, RuntimeError) as e:
+            print(f"GPU renderer unavailable ({e}), drawing in software")
+
+    return SoftwareDisplay(resolution, scale)
@@ -0,0 +1,204 @@
+"""
+Evaluation harness for scripted / AI players.
+
+Runs many headless games (see simulation.py) across a process pool. Each
+game is driven by a policy object instead of keyboard events, and the
+results are collected per run and summarized, e.g.
+
+    python evaluation.py --policy jump --episodes 10000 --hard
+"""
+
+import argparse
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import simulation as sim
+
+# DEFAULTS
+MAX_STEPS = 60 * 60 * 30  # 30 minutes of game time
+CHUNK_SIZE = 64  # episodes sent to a worker at once
+
+# SPRITE MASKS, BUILT ONCE PER WORKER PROCESS (pygame masks don't cross processes)
+_hitboxes = {}  # player type -> sim.Hitboxes
+
+
+# POLICIES
+class Policy:
+    """ Base class for players: gets the simulation state, returns Inputs """
+
+    def reset(self, seed):
+        """ Called before every episode """
+
+    def act(self, state):
+        return sim.NO_INPUT
+
+
+class IdlePolicy(Policy):
+    """ Never presses anything """
+
+
+class RandomPolicy(Policy):
+    """ Presses keys at random """
+
+    def __init__(self, jump_chance=0.05, move_chance=0.1):
+        self.jump_chance = jump_chance
+        self.move_chance = move_chance
+        self.rng = random.Random()
+
+    def reset(self, seed):
+        self.rng.seed(seed)
+
+    def act(self, state):
+        rng = self.rng
+        return sim.Inputs(
+            move_left=rng.random() < self.move_chance,
+            move_right=rng.random() < self.move_chance,
+            jump=rng.random() < self.jump_chance,
+        )
+
+
+class JumpOverPolicy(Policy):
+    """ Jumps when a ground mob gets closer than distance pixels """
+
+    def __init__(self, distance=90):
+        self.distance = distance
+
+    def act(self, state):
+        player = state.player
+        for mob in state.mobs:
+            if mob.type in sim.FLYING_MOB_TYPES:
+                continue
+            gap = mob.x - (player.x + player.width)
+            if 0 <= gap < self.distance + state.game_speed * 4:
+                return sim.Inputs(jump=True)
+        return sim.NO_INPUT
+
+POLICIES = {
+    'idle': IdlePolicy,
+    'random': RandomPolicy,
+    'jump': JumpOverPolicy,
+}
+
+
+# RESULTS
+class EpisodeResult:
+    """ Outcome of one headless game """
+
+    def __init__(self, seed, level, points, death_cause, steps):
+        self.seed = seed
+        self.level = level
+        self.points = points
+        self.death_cause = death_cause  # mob type, None if max_steps was reached
+        self.steps = steps
+
+    def stats(self):
+        """ Same shape as Game.game_loop returns """
+        return [self.level, self.points]
+
+    def __repr__(self):
+        return (f'EpisodeResult(seed={self.seed}, level={self.level}, points={self.points}, '
+                f'death_cause={self.death_cause}, steps={self.steps})')
+
+
+def run_episode(policy, sizes, seed, hard=False, max_steps=MAX_STEPS, hitboxes=None, continuous=False):
+    """ Plays one game with policy
+
+    Args:
+        policy - Policy
+        sizes - (player size, {mob type: size}), see asset_manager.sprite_sizes
+        seed - int, RNG seed of the game (and the policy)
+        hitboxes, continuous - collision, see simulation.SimState
+    """
+    player_size, mob_sizes = sizes
+    state = sim.new_game(player_size, mob_sizes, hard=hard, seed=seed, hitboxes=hitboxes, continuous=continuous)
+    policy.reset(seed)
+    sim.run(state, policy.act, max_steps)
+    return EpisodeResult(seed, state.level, state.points, state.death_cause, state.tick)
+
+def _worker_hitboxes(player_type):
+    hitboxes = _hitboxes.get(player_type)
+    if hitboxes is None:
+        import asset_manager as assets
+        hitboxes = _hitboxes[player_type] = sim.Hitboxes(*assets.sprite_masks(player_type))
+    return hitboxes
+
+def _run_chunk(policy, sizes, seeds, hard, max_steps, player_type, pixel_collision, continuous):
+    hitboxes = _worker_hitboxes(player_type) if pixel_collision else None
+    return [run_episode(policy, sizes, seed, hard, max_steps, hitboxes, continuous) for seed in seeds]
+
+def evaluate(policy, episodes=100, player_type=1, hard=False, max_steps=MAX_STEPS,
+             base_seed=0, workers=None, chunk_size=CHUNK_SIZE, pixel_collision=None, continuous_collision=None):
+    """ Plays episodes games across a process pool and returns their EpisodeResults
+
+    Args:
+        policy - Policy, must be picklable
+        player_type - int, player sprite (its size and mask are the hitbox)
+        base_seed - int, episode i uses seed base_seed + i
+        workers - int, process count (defaults to every core), 1 runs in-process
+        pixel_collision, continuous_collision - bool, default the game's (jump_game.Game)
+    """
+    import asset_manager as assets
+    sizes = assets.sprite_sizes(player_type)
+    if pixel_collision is None or continuous_collision is None:
+        from jump_game import Game
+        if pixel_collision is None:
+            pixel_collision = Game.pixel_collision
+        if continuous_collision is None:
+            continuous_collision = Game.continuous_collision
+    settings = (player_type, pixel_collision, continuous_collision)
+
+    seeds = list(range(base_seed, base_seed + episodes))
+    chunks = [seeds[i:i + chunk_size] for i in range(0, len(seeds), chunk_size)]
+
+    if workers == 1:
+        return _run_chunk(policy, sizes, seeds, hard, max_steps, *settings)
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_run_chunk, policy, sizes, chunk, hard, max_steps, *settings) for chunk in chunks]
+        for future in futures:
+            results.extend(future.result())
+    return results
+
+def summarize(results):
+    """ Aggregates EpisodeResults into a dict """
+    points = sorted(result.points for result in results)
+    levels = {}
+    causes = {}
+    for result in results:
+        levels[result.level] = levels.get(result.level, 0) + 1
+        causes[result.death_cause] = causes.get(result.death_cause, 0) + 1
+
+    return {
+        'episodes': len(results),
+        'mean_points': sum(points) / len(points) if points else 0,
+        'median_points': points[len(points) // 2] if points else 0,
+        'max_points': points[-1] if points else 0,
+        'mean_steps': sum(result.steps for result in results) / len(results) if results else 0,
+        'levels': dict(sorted(levels.items())),
+        'death_causes': causes,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Evaluate a policy on headless games')
+    parser.add_argument('--policy', choices=sorted(POLICIES), default='jump')
+    parser.add_argument('--episodes', type=int, default=1000)
+    parser.add_argument('--player', type=int, default=1)
+    parser.add_argument('--hard', action='store_true')
+    parser.add_argument('--max-steps', type=int, default=MAX_STEPS)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--bounding-boxes', action='store_true',
+                        help='test bounding boxes where each step ends (as batch_simulation) instead of the game\'s hitboxes')
+    args = parser.parse_args()
+
+    collision = (False, False) if args.bounding_boxes else (None, None)
+    results = evaluate(POLICIES[args.policy](), args.episodes, args.player, args.hard,
+                       args.max_steps, args.seed, args.workers, CHUNK_SIZE, *collision)
+    for key, value in summarize(results).items():
+        print(f'{key}: {value}')
+
+if __name__ == "__main__":
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    main()
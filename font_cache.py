@@ -0,0 +1,75 @@
+from collections import OrderedDict
+
+import pygame
+import pygame.freetype
+
+# DEFAULTS
+DEFAULT_FAMILY = 'courier'
+MAX_TEXT_SURFACES = 256  # eviction bound of the rendered text cache
+
+# CACHES
+_fonts = {}            # (family, size, bold) -> pygame.font.Font
+_freetype_fonts = {}   # (family, size, bold) -> pygame.freetype.Font
+_texts = OrderedDict() # (text, font key, colors) -> Surface, least recently used first
+
+
+def get_font(size, family=DEFAULT_FAMILY, bold=False):
+    """ Returns a shared SysFont, scanning the system fonts only once per key """
+    key = (family, size, bold)
+    font = _fonts.get(key)
+    if font is None:
+        font = pygame.font.SysFont(family, size, bold=bold)
+        _fonts[key] = font
+    return font
+
+def get_freetype_font(size, family=DEFAULT_FAMILY, bold=False):
+    """ Returns a shared freetype SysFont """
+    key = (family, size, bold)
+    font = _freetype_fonts.get(key)
+    if font is None:
+        font = pygame.freetype.SysFont(family, size, bold=bold)
+        _freetype_fonts[key] = font
+    return font
+
+def _cached(key, create):
+    """ Looks up a rendered surface in the LRU cache, creating it on a miss """
+    surface = _texts.get(key)
+    if surface is not None:
+        _texts.move_to_end(key)
+        return surface
+
+    surface = create()
+    _texts[key] = surface
+    if len(_texts) > MAX_TEXT_SURFACES:
+        _texts.popitem(last=False)
+    return surface
+
+def render_text(text, size, color, family=DEFAULT_FAMILY, bold=False, antialias=True):
+    """ Returns a cached pygame.font rendering of text.
+        The surface is shared, so callers must not draw onto it.
+    """
+    key = ('font', text, family, size, bold, antialias, tuple(color))
+    return _cached(key, lambda: get_font(size, family, bold).render(text, antialias, color))
+
+def render_freetype_text(text, size, fgcolor, bgcolor=None, family=DEFAULT_FAMILY, bold=False):
+    """ Returns a cached freetype rendering of text, converted for blitting """
+    key = ('freetype', text, family, size, bold, tuple(fgcolor),
+           tuple(bgcolor) if bgcolor is not None else None)
+
+    def create():
+        font = get_freetype_font(size, family, bold)
+        surface, _ = font.render(text=text, fgcolor=fgcolor, bgcolor=bgcolor)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert_alpha()
+        return surface
+
+    return _cached(key, create)
+
+def clear_cache():
+    _fonts.clear()
+    _freetype_fonts.clear()
+    _texts.clear()
+
+def clear_text_cache():
+    """ Drops rendered surfaces but keeps the loaded fonts """
+    _texts.clear()
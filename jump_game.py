@@ -1,36 +1,51 @@
+import gc
+import os
+import time
 import pygame
 import pygame.freetype
 import pygame_textinput
 from pygame.sprite import Sprite
 from enum import Enum
 from random import randrange
+import audio
 import db_configurations as db
-
-# CREATE TABLE IF FIRST TIME RUNNING
-conn = db.create_connection(db.db_file)
-db.create_table(conn, db.create_table_sql)
+from score_writer import ScoreWriter
+from leaderboard_cache import LeaderboardCache
+import asset_manager as assets
+import simulation as sim
+import replay
+import font_cache as fonts
+from screen_runner import ScreenRunner, CLOSE
+from dirty_renderer import DirtyRenderer
+import display_backend
+from sprite_atlas import Atlas
+from profiler import PROFILER
+
+# HIGH SCORE SCREEN
+SCORES_PER_PAGE = 10
+
+# DATABASE (OPENED BY init_database, NOT AT IMPORT)
+conn = None
+LEADERBOARD = None
+SCORE_WRITER = None
 
 # COLORS
 BLUE = (17, 50, 87)
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 
-# BACKGROUND MUSIC AND SOUND EFFECTS
-pygame.mixer.init()
-pygame.mixer.music.load('sounds/bg_music.mp3')
-pygame.mixer.music.set_volume(0.5)
-
-jump_sound = pygame.mixer.Sound('sounds/jump_sound.mp3')
-click_sound = pygame.mixer.Sound('sounds/click_sound.mp3')
-game_over_sound = pygame.mixer.Sound('sounds/game_over_sound.mp3')
-hit_sound_effect = pygame.mixer.Sound('sounds/hit_sound_effect.mp3')
-
 # FUNCTION USED BY UI ELEMENT Class
 def create_surface_with_text(text, font_size, text_rgb, bg_rgb):
     """ Returns surface with text written on """
-    font = pygame.freetype.SysFont("courier", font_size, bold=True)
-    surface, _ = font.render(text=text, fgcolor=text_rgb, bgcolor=bg_rgb)
-    return surface.convert_alpha()
+    return fonts.render_freetype_text(text, font_size, text_rgb, bg_rgb, bold=True)
+
+# PRE-RENDERED BUTTON STATES, SHARED BY EVERY SCREEN
+BUTTON_ATLAS = Atlas()
+
+def button_state(text, font_size, text_rgb, bg_rgb):
+    """ (atlas page, area) of a button label, rendered the first time it is asked for """
+    return BUTTON_ATLAS.get((text, font_size, tuple(text_rgb), tuple(bg_rgb)),
+                            lambda: create_surface_with_text(text, font_size, text_rgb, bg_rgb))
 
 # UI ELEMENT Class (Buttons)
 class UIElement(Sprite):
@@ -47,31 +62,40 @@ class UIElement(Sprite):
         """
         self.mouse_over = False  # indicates if the mouse is over the element
 
-        # create the default image
-        default_image = create_surface_with_text(
-            text=text, font_size=font_size, text_rgb=text_rgb, bg_rgb=bg_rgb
-        )
-
-        # create the image that shows when mouse is over the element
-        highlighted_image = create_surface_with_text(
-            text=text, font_size=font_size * 1.25, text_rgb=text_rgb, bg_rgb=bg_rgb
-        )
-
-        # add both images and their rects to lists
-        self.images = [default_image, highlighted_image]
-        self.rects = [
-            default_image.get_rect(center=center_position),
-            highlighted_image.get_rect(center=center_position),
-        ]
+        self.center_position = center_position
+        self.font_size = font_size
+        self.bg_rgb = bg_rgb
+        self.text_rgb = text_rgb
+        self.text = None
+        self.set_text(text)
 
         self.action = action
         # calls the init method of the parent sprite class
         super().__init__()
 
+    def set_text(self, text):
+        """ Changes the label, only looking up new states if the text changed """
+        if text == self.text:
+            return
+        self.text = text
+
+        # the default and the highlighted (mouse over) state, as (atlas page, area)
+        self.states = [
+            button_state(text, self.font_size, self.text_rgb, self.bg_rgb),
+            button_state(text, self.font_size * 1.25, self.text_rgb, self.bg_rgb),
+        ]
+        self.rects = [pygame.Rect((0, 0), area.size) for _, area in self.states]
+        for rect in self.rects:
+            rect.center = self.center_position
+
     # properties that vary the image and its rect when the mouse is over the element
     @property
     def image(self):
-        return self.images[1] if self.mouse_over else self.images[0]
+        return self.states[self.mouse_over][0]
+
+    @property
+    def area(self):
+        return self.states[self.mouse_over][1]
 
     @property
     def rect(self):
@@ -90,17 +114,21 @@ class UIElement(Sprite):
 
     def draw(self, surface):
         """ Draws element onto a surface """
-        surface.blit(self.image, self.rect)
+        surface.blit(self.image, self.rect, self.area)
 
 # GAME Class
 class Game():
     # GAME CONSTANTS
-    FLOOR = 400
-    GRAVITY = 0.4
+    FLOOR = sim.FLOOR
+    GRAVITY = sim.GRAVITY
     SCREEN_RESOLUTION = (750, 500)
     FPS = 60
+    MENU_FPS = 30
+    MAX_FRAME_TIME = 0.25  # longest stall (in seconds) the simulation catches up on
     CLOCK = pygame.time.Clock()
-    SCREEN = pygame.display.set_mode(SCREEN_RESOLUTION)
+    DISPLAY = None  # display_backend display, opened by init_app
+    SCREEN = None  # surface of DISPLAY everything not drawn through it goes on
+    MOB_POOL = None  # MobPool shared by every game, created by the first one
 
     # GAME VARIABLES
     game_speed = 3
@@ -108,6 +136,10 @@ class Game():
     game_sounds = True
     game_diff_hard = False
     game_control_arrow_keys = False
+    game_dense_mobs = False  # many mobs on screen at once instead of one at a time
+    pixel_collision = True  # sprite masks as hitboxes instead of bounding boxes
+    continuous_collision = True  # swept collision, fast mobs can't pass through the player between steps
+    dirty_rendering = False  # only redraw changed regions (DODGE_DIRTY_RENDERING=1, the GPU display ignores it)
     mob_list = []
     player_type = 1
     pause = False
@@ -118,97 +150,197 @@ class Game():
 
         self.move_left = False
         self.move_right = False
-        self.points = 0
-        self.level = 1
-        self.floor_pos = 0
+        self.move_down = False
+        self.jump = False
 
         self.BLACK = (0, 0, 0)
 
-        self.font = pygame.font.SysFont('courier', 20)
-        self.background = 1
-
-    def score(self):
-        """ Increase score """
-        if Game.game_diff_hard:
-            self.points += 2
+        # SIMULATION STATE (positions are interpolated between the last two steps)
+        player_size, mob_sizes = assets.sprite_sizes(player.char_type)
+        if Game.game_dense_mobs:
+            max_mobs, spawn_interval = sim.DENSE_MAX_MOBS, sim.DENSE_SPAWN_INTERVAL
         else:
-            self.points += 1
+            max_mobs, spawn_interval = sim.MAX_MOBS, sim.SPAWN_INTERVAL
+        hitboxes = sim.Hitboxes(*assets.sprite_masks(player.char_type)) if Game.pixel_collision else None
+        self.state = sim.new_game(player_size, mob_sizes, Game.game_diff_hard,
+                                  Game.game_speed, randrange(1 << 32), max_mobs, spawn_interval, hitboxes,
+                                  Game.continuous_collision)
+        self.snapshot()
+        if Game.MOB_POOL is None:
+            Game.MOB_POOL = MobPool()
+        self.mob_views = {}  # mob id -> Mob, taken from Game.MOB_POOL
+        Game.mob_list = []
+        self.entities = [player]  # player and mob views, as handed to the dirty renderer
 
-        if self.points % 750 == 0:
-            self.level += 1
-            self.background += 1
-            if Game.game_diff_hard:
-                Game.game_speed += 2.5
-            else:
-                Game.game_speed += 2
+        # SEED AND PER-STEP INPUTS, ENOUGH TO REPLAY THE RUN (see replay.py)
+        self.recording = replay.Recording.start(self.state, player.char_type)
 
-        if self.level > 7 and self.background > 7:
-            self.background = 1
+    @property
+    def points(self):
+        return self.state.points
 
-        level_text = self.font.render("Level: " + str(self.level), True, (0, 0, 0))
-        level_text_rect = level_text.get_rect()
-        level_text_rect.center = (450, 40)
-        text = self.font.render("Points: " + str(self.points), True, (0, 0, 0))
-        text_rect = text.get_rect()
-        text_rect.center = (600, 40)
-        Game.SCREEN.blit(level_text, level_text_rect)
-        Game.SCREEN.blit(text, text_rect)
+    @property
+    def level(self):
+        return self.state.level
+
+    @property
+    def background(self):
+        return self.state.background
+
+    def snapshot(self):
+        """ Remembers what is needed to interpolate from the current step """
+        state = self.state
+        self.prev_x = state.player.x
+        self.prev_y = state.player.y
+        self.prev_floor_pos = state.floor_pos
+        self.prev_speed = state.game_speed  # how far every mob moves during the next step
+        self.prev_next_mob_id = state.next_mob_id  # mobs from this id on spawn during it
+
+    def inputs(self):
+        """ The shared Inputs for the keys held (see replay.INPUTS) """
+        return replay.INPUTS[(replay.MOVE_LEFT if self.move_left else 0) | (replay.MOVE_RIGHT if self.move_right else 0)
+                             | (replay.JUMP if self.jump else 0) | (replay.MOVE_DOWN if self.move_down else 0)]
+
+    def step(self):
+        """ Advances the simulation by one fixed timestep """
+        self.snapshot()
+        inputs = self.inputs()
+        self.recording.append(inputs)
+        if PROFILER.enabled:
+            sim.profiled_step(self.state, inputs, PROFILER.section)
+        else:
+            sim.step(self.state, inputs)
+        self.jump = False
+        Game.game_speed = self.state.game_speed
+
+    def sync_views(self, alpha):
+        """ Places the player and mob sprites between the last two steps.
+            Views are reused from frame to frame and recycled through the pool.
+        """
+        body = self.state.player
+        self.player.sync(lerp(self.prev_x, body.x, alpha), lerp(self.prev_y, body.y, alpha), body.flip)
+
+        mob_views = self.mob_views
+        mob_list = Game.mob_list
+        mob_list.clear()
+        moved = self.prev_speed * (1 - alpha)  # still to go until the current step
+        for mob in self.state.mobs:
+            view = mob_views.get(mob.id)
+            if view is None:
+                view = mob_views[mob.id] = Game.MOB_POOL.take(mob.type)
+            if mob.id < self.prev_next_mob_id:
+                view.sync(mob.x + moved, mob.y)
+            else:
+                view.sync(mob.x, mob.y)  # spawned this step
+            mob_list.append(view)
+
+        if len(mob_views) > len(mob_list):
+            self.release_views()
+
+        del self.entities[1:]
+        self.entities.extend(mob_list)
+
+    def release_views(self, keep_alive=True):
+        """ Returns the views of mobs that are gone (or all of them) to the pool """
+        alive = {mob.id for mob in self.state.mobs} if keep_alive else ()
+        for mob_id in [mob_id for mob_id in self.mob_views if mob_id not in alive]:
+            Game.MOB_POOL.give_back(self.mob_views.pop(mob_id))
+
+    def floor_position(self, alpha):
+        prev_floor_pos = self.prev_floor_pos
+        if prev_floor_pos < self.state.floor_pos:  # wrapped around
+            return self.state.floor_pos
+        return lerp(prev_floor_pos, self.state.floor_pos, alpha)
+
+    def hud_texts(self):
+        """ Returns the level and points texts as (surface, center) """
+        level_text = fonts.render_text("Level: " + str(self.level), 20, BLACK)
+        text = fonts.render_text("Points: " + str(self.points), 20, BLACK)
+        return [(level_text, (450, 40)), (text, (600, 40))]
+
+    def draw_hud(self):
+        """ Displays level and points """
+        for surface, center in self.hud_texts():
+            Game.DISPLAY.blit(surface, surface.get_rect(center=center))
 
     def reset(self):
         """ Resets the game"""
+        self.release_views(keep_alive=False)
         Game.mob_list = []
-        self.level = 1
+        assets.background_streamer().rewind(1)  # the next run starts on the first background
         if Game.game_diff_hard:
             Game.game_speed = 8
         else:
             Game.game_speed = 3
 
-    def draw_background(self):
+    def draw_background(self, floor_pos):
         """ Displays background """
-        self.bg_surface = pygame.image.load(f'img/bg/{self.background}.png')
-        self.floor_surface = pygame.image.load('img/floor.png')
-
-        Game.SCREEN.fill(BLACK)
-        Game.SCREEN.blit(self.bg_surface, (0, 0))
-        Game.SCREEN.blit(self.floor_surface, (self.floor_pos, 400))
-        Game.SCREEN.blit(self.floor_surface, (self.floor_pos + 500, 400))
+        self.bg_surface = assets.background_image(self.background)
+        self.floor_surface = assets.floor_image()
+
+        floor_pos = round(floor_pos)  # once, so both tiles (and the dirty renderer's floor) line up
+
+        Game.DISPLAY.fill(BLACK)
+        Game.DISPLAY.blit(self.bg_surface, (0, 0))
+        Game.DISPLAY.blit(self.floor_surface, (floor_pos, 400))
+        Game.DISPLAY.blit(self.floor_surface, (floor_pos + 500, 400))
+
+    def render(self, renderer, alpha):
+        """ Draws the current frame, alpha being the fraction of a step since the last one """
+        self.sync_views(alpha)
+        floor_pos = self.floor_position(alpha)
+        assets.background_streamer().update(self.background, self.points, sim.LEVEL_POINTS)
+
+        if renderer is None:
+            # EVERY FRAME IN FULL, AS BLITS OR AS TEXTURES DEPENDING ON THE DISPLAY
+            with PROFILER.section('draw_background'):
+                self.draw_background(floor_pos)
+            with PROFILER.section('draw_entities'):
+                self.player.draw()
+                for mob in Game.mob_list:
+                    mob.draw(Game.DISPLAY)
+            with PROFILER.section('draw_hud'):
+                self.draw_hud()
+            overlay = PROFILER.draw_overlay(Game.SCREEN)
+            if overlay is not None:
+                Game.DISPLAY.show_canvas(overlay)
+            with PROFILER.section('display_update'):
+                Game.DISPLAY.present_frame()
+        else:
+            with PROFILER.section('dirty_render'):
+                renderer.render(self.background, assets.background_image(self.background), floor_pos,
+                                self.entities, self.hud_texts(), PROFILER.draw_overlay)
 
     def game_loop(self):
-        """ Heart of the game - the game loop """
-        while self.running:
-            Game.CLOCK.tick(Game.FPS)
+        """ Heart of the game - the game loop.
 
-            self.floor_pos -= Game.game_speed
-            self.draw_background()
-
-            if self.floor_pos <= -500:
-                self.floor_pos = 0
-
-            self.player.draw()
-            self.player.move(self.move_left, self.move_right)
+            Automatic garbage collection is off while playing: entities are pooled,
+            so there is next to nothing cyclic to collect, and a collection in the
+            middle of a run shows up as a dropped frame. It runs again afterwards.
+        """
+        gc.disable()
+        try:
+            return self.frame_loop()
+        finally:
+            gc.enable()
+
+    def frame_loop(self):
+        """ Events, fixed steps and a render per frame until the run ends """
+        renderer = None
+        if Game.dirty_rendering and not Game.DISPLAY.gpu:
+            renderer = DirtyRenderer(Game.SCREEN, assets.floor_image(), Game.FLOOR)
+
+        accumulator = 0.0
+        Game.CLOCK.tick()
+        while self.running:
+            accumulator += min(Game.CLOCK.tick(Game.FPS) / 1000, Game.MAX_FRAME_TIME)
+            frame_start = time.perf_counter()
 
-            mob_type = randrange(1, 8)
-            if len(Game.mob_list) == 0:
-                monster_img = pygame.image.load(f'img/enemy/{mob_type}.png')
-                Game.mob_list.append(Mob(monster_img, mob_type))
+            with PROFILER.section('event_pump'):
+                events = pygame.event.get()
 
-            # COLLISION
-            for mob in Game.mob_list:
-                mob.draw(Game.SCREEN)
-                mob.update()
-                if self.player.rect.colliderect(mob.rect):
-                    if Game.game_sounds:
-                        hit_sound_effect.play()
-                        
-                    pygame.time.delay(2000)
-                    self.running = False
-                    level = self.level
-                    self.reset()
-                    return [level, self.points]
-
-            self.score()
-
-            for event in pygame.event.get():
+            for event in events:
+                PROFILER.handle_event(event)
                 if not Game.game_control_arrow_keys:
                     # KEYBOARD INPUT (WASD Keys)
                     if event.type == pygame.KEYDOWN:
@@ -217,18 +349,21 @@ class Game():
                         if event.key == pygame.K_d:
                             self.move_right = True
                         if event.key == pygame.K_w:
-                            self.player.move_up = True
+                            self.jump = True
                             if Game.game_sounds:
-                                jump_sound.play()
+                                audio.play('jump')
                         if event.key == pygame.K_s:
-                            self.player.move_down = True
+                            self.move_down = True
                         if event.key == pygame.K_ESCAPE:
                             Game.pause = True
-                            game_state = pause_screen(Game.SCREEN)
+                            game_state = SCREENS.pause.show(Game.SCREEN)
 
                             if game_state == GameState.TITLE:
                                 self.reset()
                                 return
+                            if renderer is not None:
+                                renderer.invalidate()  # the menu covered the whole screen
+                            Game.CLOCK.tick()
 
                     # KEYBOARD INPUT RELEASE
                     if event.type == pygame.KEYUP:
@@ -237,7 +372,7 @@ class Game():
                         if event.key == pygame.K_d:
                             self.move_right = False
                         if event.key == pygame.K_s:
-                            self.player.move_down = False
+                            self.move_down = False
                 else:
                     # KEYBOARD INPUT (Arrow Keys)
                     if event.type == pygame.KEYDOWN:
@@ -246,18 +381,21 @@ class Game():
                         if event.key == pygame.K_RIGHT:
                             self.move_right = True
                         if event.key == pygame.K_UP:
-                            self.player.move_up = True
+                            self.jump = True
                             if Game.game_sounds:
-                                jump_sound.play()
+                                audio.play('jump')
                         if event.key == pygame.K_DOWN:
-                            self.player.move_down = True
+                            self.move_down = True
                         if event.key == pygame.K_ESCAPE:
                             Game.pause = True
-                            game_state = pause_screen(Game.SCREEN)
+                            game_state = SCREENS.pause.show(Game.SCREEN)
 
                             if game_state == GameState.TITLE:
                                 self.reset()
                                 return
+                            if renderer is not None:
+                                renderer.invalidate()  # the menu covered the whole screen
+                            Game.CLOCK.tick()
 
                     # KEYBOARD INPUT RELEASE
                     if event.type == pygame.KEYUP:
@@ -266,99 +404,101 @@ class Game():
                         if event.key == pygame.K_RIGHT:
                             self.move_right = False
                         if event.key == pygame.K_DOWN:
-                            self.player.move_down = False
+                            self.move_down = False
+
+            # FIXED TIMESTEP SIMULATION
+            with PROFILER.section('simulation'):
+                while accumulator >= sim.TIMESTEP and not self.state.over:
+                    self.step()
+                    accumulator -= sim.TIMESTEP
 
-            pygame.display.update()
+            self.render(renderer, accumulator / sim.TIMESTEP)
+            PROFILER.record('frame', time.perf_counter() - frame_start)
+
+            # COLLISION
+            if self.state.over:
+                self.recording.finish(self.state)
+                if Game.game_sounds:
+                    audio.play('hit')
+
+                pygame.time.delay(2000)
+                self.running = False
+                stats = self.state.stats()
+                self.reset()
+                return stats
 
         pygame.quit()
 
+# INTERPOLATION
+def lerp(start, end, alpha):
+    return start + (end - start) * alpha
+
 # PLAYER Class
 class Player(pygame.sprite.Sprite):
     def __init__(self, char_type):
         pygame.sprite.Sprite.__init__(self)
         self.char_type = char_type
-        self.speed = 10
+        self.flip = False
 
-        self.move_up = False
-        self.vel_y = 0
-        self.jumping = True
+        # FACING RIGHT AND FLIPPED, AS (ATLAS PAGE, AREA)
+        self.sprites = (assets.player_sprite(self.char_type), assets.player_sprite(self.char_type, True))
+        self.rect = pygame.Rect((0, 0), self.sprites[0][1].size)
+        self.rect.center = (75, Game.FLOOR)
 
-        self.move_down = False
+    # FOLLOW THE SIMULATED PLAYER
+    def sync(self, x, y, flip):
+        self.rect.x = round(x)
+        self.rect.y = round(y)
+        self.flip = flip
 
-        self.direction = 1
-        self.flip = False
+    # CURRENT IMAGE (FACING LEFT OR RIGHT), THE ATLAS PAGE AND THE AREA TO BLIT FROM IT
+    @property
+    def image(self):
+        return self.sprites[self.flip][0]
+
+    @property
+    def area(self):
+        return self.sprites[self.flip][1]
 
-        self.img = pygame.image.load(f'img/player/{self.char_type}.png')
-        self.rect = self.img.get_rect()
-        self.rect.center = (75, Game.FLOOR)
-    
-    # MOVEMENTS
-    def move(self, moving_left, moving_right):
-        # CHANGE IN X AND Y
-        dx = 0
-        dy = 0
-
-        # MOVE LEFT AND RIGHT
-        if moving_left and self.rect.x > 0:
-            dx = -self.speed
-            self.flip = True
-            self.direction = -1
-        if moving_right and self.rect.x <= 718:
-            dx = self.speed
-            self.flip = False
-            self.direction = 1
-        # MOVING DOWN
-        if self.move_down:
-            dy = self.speed
-
-        # JUMP MOVEMENT
-        if self.move_up == True and self.jumping == False:
-            self.vel_y = -11
-            self.move_up = False
-            self.jumping = True
-        
-        # GRAVITY
-        self.vel_y += Game.GRAVITY
-        if self.vel_y > 10:
-            self.vel_y
-        dy += self.vel_y
-
-        # CHECK FLOOR COLLISION
-        if self.rect.bottom + dy > Game.FLOOR:
-            dy = Game.FLOOR - self.rect.bottom
-            self.jumping = False
-
-        # UPDATE RECTANGLE POSITION
-        self.rect.x += dx
-        self.rect.y += dy
-    
     # DRAW UNIT ON SCREEN
     def draw(self):
-        Game.SCREEN.blit(pygame.transform.flip(self.img, self.flip, False), self.rect)
+        Game.DISPLAY.blit(self.image, self.rect, self.area)
 
 # MOB Class
 class Mob():
-    def __init__(self, image, type):
-        self.image = image
-        self.rect = self.image.get_rect()
+    __slots__ = ('image', 'area', 'rect', 'type')
+
+    def __init__(self, type):
+        self.image, self.area = assets.enemy_sprite(type)  # atlas page and the area to blit
+        self.rect = pygame.Rect((0, 0), self.area.size)
         self.type = type
 
-        self.rect.x = Game.SCREEN_RESOLUTION[0]
+    # FOLLOW THE SIMULATED MOB
+    def sync(self, x, y):
+        self.rect.x = round(x)
+        self.rect.y = round(y)
 
-        rand_height = randrange(150, 200)
+    def draw(self, screen):
+        screen.blit(self.image, self.rect, self.area)
 
-        if self.type in [6, 7]:
-            self.rect.y = self.image.get_size()[1] + rand_height
-        else:
-            self.rect.y = Game.FLOOR - self.image.get_size()[1]
-         
-    def update(self):
-        self.rect.x -= Game.game_speed
-        if self.rect.x <= -self.rect.width:
-            Game.mob_list.pop()
+# POOL OF MOB VIEWS
+class MobPool():
+    """ Recycled Mob views, one free list per mob type, drawn from the sprite atlas """
 
-    def draw(self, screen):
-        screen.blit(self.image, self.rect)
+    PREALLOCATE = 2  # views made up front per mob type
+
+    def __init__(self, size=PREALLOCATE):
+        self.free = {mob_type: [Mob(mob_type) for _ in range(size)]
+                     for mob_type in sim.MOB_TYPES}
+
+    def take(self, mob_type):
+        free = self.free[mob_type]
+        if free:
+            return free.pop()
+        return Mob(mob_type)
+
+    def give_back(self, mob):
+        self.free[mob.type].append(mob)
 
 # GAME STATES Class
 class GameState(Enum):
@@ -375,110 +515,49 @@ class GameState(Enum):
     DIFF = 8
     CONTROLS = 9
     ABOUT = 10
+    PREV_PAGE = 11
+    NEXT_PAGE = 12
+    MOBS = 13
 
 """ GAME SCREEN-RELATED FUNCTIONS """
 
-# TITLE SCREEN
-def title_screen(screen):
-    music_ongoing = pygame.mixer.music.get_busy()
-
-    if music_ongoing == False and Game.game_music == True:
-        pygame.mixer.music.play(-1)
-    
-    logo = pygame.image.load('img/logo.png')
-    logo_rect = logo.get_rect()
-    center_x = Game.SCREEN_RESOLUTION[0]/2
-    center_y = Game.SCREEN_RESOLUTION[1]/2
-
-    logo_rect.center = (center_x, center_y - 30)
-
-    prev_char_btn = UIElement(
-        center_position=(200, 100),
-        font_size=40,
-        bg_rgb=BLUE,
-        text_rgb=WHITE,
-        text="<",
-        action=GameState.PREV,
-    )
-    next_char_btn = UIElement(
-        center_position=(550, 100),
-        font_size=40,
-        bg_rgb=BLUE,
-        text_rgb=WHITE,
-        text=">",
-        action=GameState.NEXT,
-    )
-    start_btn = UIElement(
-        center_position=(375, 300),
-        font_size=25,
-        bg_rgb=BLUE,
-        text_rgb=WHITE,
-        text="Start",
-        action=GameState.NEWGAME,
-    )
-    optn_btn = UIElement(
-        center_position=(375, 337.5),
-        font_size=25,
-        bg_rgb=BLUE,
-        text_rgb=WHITE,
-        text="Options",
-        action=GameState.OPTIONS,
-    )
-    view_btn = UIElement(
-        center_position=(375, 375),
-        font_size=25,
-        bg_rgb=BLUE,
-        text_rgb=WHITE,
-        text="View High Scores",
-        action=GameState.VIEWSCORES,
-    )
-    about_btn = UIElement(
-        center_position=(375, 412.5),
-        font_size=25,
-        bg_rgb=BLUE,
-        text_rgb=WHITE,
-        text="About us",
-        action=GameState.ABOUT,
-    )
-    quit_btn = UIElement(
-        center_position=(375, 450),
-        font_size=25,
-        bg_rgb=BLUE,
-        text_rgb=WHITE,
-        text="Quit",
-        action=GameState.CONFIRM_QUIT,
-    )
-
-    buttons = [prev_char_btn, next_char_btn, start_btn, optn_btn, view_btn, about_btn, quit_btn]
-
-    player_icon = pygame.image.load(f'img/player_icons/{Game.player_type}.png')
-    player_icon_rect = player_icon.get_rect()
-    player_icon_rect.center = (center_x, 100)
-
-    while True:
-        mouse_up = False
-        for event in pygame.event.get():
-            if event.type == pygame.MOUSEBUTTONUP and event.button == 1:
-                mouse_up = True
+# CLICK SOUND FOR MENU BUTTONS
+def play_click_sound():
+    if Game.game_sounds:
+        audio.play('click')
 
-        screen.fill(BLUE)
-        screen.blit(logo, logo_rect)
+# SHARED MENU LOOP (FRAME-RATE CAPPED, SLEEPS WHILE IDLE)
+MENU_RUNNER = ScreenRunner(Game.MENU_FPS, on_click=play_click_sound)
 
-        for button in buttons:
-            ui_action = button.update(pygame.mouse.get_pos(), mouse_up)
-            if ui_action is not None:
-                if Game.game_sounds:
-                    click_sound.play()
+# TEXT LABEL
+class Label():
+    """ Text rendered once and drawn centered on a position """
 
-                return ui_action
-            button.draw(screen)
+    def __init__(self, text, font_size, center_position):
+        """
+        Args:
+            text - string of text to write
+            font_size - int
+            center_position - tuple (x, y)
+        """
+        self.font_size = font_size
+        self.center_position = center_position
+        self.text = None
+        self.set_text(text)
+
+    def set_text(self, text):
+        """ Re-renders the label, only if the text changed """
+        if text == self.text:
+            return
+        self.text = text
+        self.image = fonts.render_text(text, self.font_size, WHITE)
+        self.rect = self.image.get_rect(center=self.center_position)
 
-        Game.SCREEN.blit(player_icon, player_icon_rect)
-        pygame.display.flip()
+    def draw(self, surface):
+        surface.blit(self.image, self.rect)
 
-# PLAY SCREEN
-def play_game(screen):
-    return_btn = UIElement(
+def return_button():
+    return UIElement(
         center_position=(150, 450),
         font_size=20,
         bg_rgb=BLUE,
@@ -487,505 +566,519 @@ def play_game(screen):
         action=GameState.TITLE,
     )
 
-    # GAME INSTANCE
-    player = Player(Game.player_type)
-    game = Game(player)
+# BASE OF EVERY MENU SCREEN
+class MenuScreen():
+    """ A menu screen that builds its widgets the first time it is shown and keeps them
 
-    # RUN GAME LOOP AND GET STATISTICS
-    stats = game.game_loop()
+        build() creates what never changes (buttons, texts, images), refresh()
+        updates what depends on the settings right before each show.
+    """
 
-    # GAME OVER SECTION
-    if stats is not None:
-        if Game.game_music:
-            pygame.mixer.music.stop()
-        if Game.game_sounds:
-            game_over_sound.play()
-        
-        # INPUT PLAYER NAME
-        text_input = pygame_textinput.TextInput()
-        
-        saved = False
-        while True:
-            mouse_up = False
-            events = pygame.event.get()
+    def __init__(self):
+        self.built = False
+        self.buttons = []
+        self.labels = []
+        self.images = []  # (Surface, Rect)
 
-            for event in events:
-                if event.type == pygame.MOUSEBUTTONUP and event.button == 1:
-                    mouse_up = True
+    def build(self):
+        pass
 
-            screen.fill(BLUE)
+    def refresh(self):
+        pass
 
-            # ENTERING THE PLAYER NAME
-            if text_input.update(events):
-                player_name = text_input.get_text()
-                if player_name == "":
-                    player_name = "Anonymous"
+    def draw(self, screen):
+        screen.fill(BLUE)
+        for image, rect in self.images:
+            screen.blit(image, rect)
+        for label in self.labels:
+            label.draw(screen)
+
+    def run(self, screen):
+        return MENU_RUNNER.run(screen, self.draw, self.buttons)
+
+    def show(self, screen):
+        """ Runs the screen and returns the chosen GameState """
+        if not self.built:
+            self.build()
+            self.built = True
+        self.refresh()
+        return self.run(screen)
 
-                # SAVE TO DATABASE
-                record = (player_name, stats[0], stats[1])
-                db.insert_score(conn, record)
-                saved = True
-                
+# TITLE SCREEN
+class TitleScreen(MenuScreen):
+    def build(self):
+        center_x = Game.SCREEN_RESOLUTION[0]/2
+        center_y = Game.SCREEN_RESOLUTION[1]/2
+
+        logo = assets.load_image(assets.LOGO_IMAGE)
+        self.images.append((logo, logo.get_rect(center=(center_x, center_y - 30))))
+
+        prev_char_btn = UIElement(
+            center_position=(200, 100),
+            font_size=40,
+            bg_rgb=BLUE,
+            text_rgb=WHITE,
+            text="<",
+            action=GameState.PREV,
+        )
+        next_char_btn = UIElement(
+            center_position=(550, 100),
+            font_size=40,
+            bg_rgb=BLUE,
+            text_rgb=WHITE,
+            text=">",
+            action=GameState.NEXT,
+        )
+        start_btn = UIElement(
+            center_position=(375, 300),
+            font_size=25,
+            bg_rgb=BLUE,
+            text_rgb=WHITE,
+            text="Start",
+            action=GameState.NEWGAME,
+        )
+        optn_btn = UIElement(
+            center_position=(375, 337.5),
+            font_size=25,
+            bg_rgb=BLUE,
+            text_rgb=WHITE,
+            text="Options",
+            action=GameState.OPTIONS,
+        )
+        view_btn = UIElement(
+            center_position=(375, 375),
+            font_size=25,
+            bg_rgb=BLUE,
+            text_rgb=WHITE,
+            text="View High Scores",
+            action=GameState.VIEWSCORES,
+        )
+        about_btn = UIElement(
+            center_position=(375, 412.5),
+            font_size=25,
+            bg_rgb=BLUE,
+            text_rgb=WHITE,
+            text="About us",
+            action=GameState.ABOUT,
+        )
+        quit_btn = UIElement(
+            center_position=(375, 450),
+            font_size=25,
+            bg_rgb=BLUE,
+            text_rgb=WHITE,
+            text="Quit",
+            action=GameState.CONFIRM_QUIT,
+        )
 
-            display_end_game_result(stats, screen, saved)
+        self.buttons = [prev_char_btn, next_char_btn, start_btn, optn_btn, view_btn, about_btn, quit_btn]
+        self.player_type = None
 
-            screen.blit(text_input.get_surface(), (300, 143))
-            
-            pygame.draw.rect(screen, WHITE, pygame.Rect(200, 130, 350, 50), 2)
+    def refresh(self):
+        if Game.game_music == True:
+            audio.play_music()
 
-            ui_action = return_btn.update(pygame.mouse.get_pos(), mouse_up)
-            if ui_action is not None:
-                if Game.game_sounds:
-                    click_sound.play()
+        # ONLY THE PLAYER ICON CHANGES BETWEEN SHOWS
+        if self.player_type != Game.player_type:
+            self.player_type = Game.player_type
+            self.player_icon = assets.player_icon_image(Game.player_type)
+            self.player_icon_rect = self.player_icon.get_rect(center=(Game.SCREEN_RESOLUTION[0]/2, 100))
 
-                return ui_action
-            return_btn.draw(screen)
+    def draw(self, screen):
+        super().draw(screen)
+        screen.blit(self.player_icon, self.player_icon_rect)
+
+# GAME OVER SCREEN
+class GameOverScreen(MenuScreen):
+    def build(self):
+        self.labels = [
+            Label("GAME OVER", 30, (380, 50)),
+            Label("Type your name and press Enter to Save", 15, (380, 100)),
+        ]
+        self.level_label = Label("", 30, (380, 250))
+        self.score_label = Label("", 30, (380, 290))
+        self.saved_label = Label("Saved", 20, (380, 350))
+        self.buttons = [return_button()]
 
-            pygame.display.flip()
-    else:
-        return GameState.TITLE
+        # INPUT PLAYER NAME
+        self.text_input = pygame_textinput.TextInput()
+
+    def start(self, stats, recording):
+        """ Sets the results of the game that just ended, before show """
+        self.stats = stats
+        self.recording = recording
+
+    def refresh(self):
+        self.level_label.set_text("Level: " + str(self.stats[0]))
+        self.score_label.set_text("Score: " + str(self.stats[1]))
+        self.text_input.clear_text()
+        self.saved = False
+
+    def handle_events(self, events):
+        # ENTERING THE PLAYER NAME
+        if self.text_input.update(events):
+            player_name = self.text_input.get_text()
+            if player_name == "":
+                player_name = "Anonymous"
+
+            # SAVE TO DATABASE
+            difficulty = db.HARD if Game.game_diff_hard else db.EASY
+            record = (player_name, self.stats[0], self.stats[1], difficulty)
+            SCORE_WRITER.submit(record)
+            if not self.saved:
+                try:
+                    replay.save_recording(self.recording, player_name)
+                except OSError as e:
+                    print(e)
+            self.saved = True
 
-# PAUSE SCREEN
-def pause_screen(screen):
-    large_font = pygame.font.SysFont("courier", 80)
-    small_font = pygame.font.SysFont("courier", 15)
+    def draw(self, screen):
+        super().draw(screen)
+        self.level_label.draw(screen)
+        self.score_label.draw(screen)
+        if self.saved:
+            self.saved_label.draw(screen)
+        screen.blit(self.text_input.get_surface(), (300, 143))
+        pygame.draw.rect(screen, WHITE, pygame.Rect(200, 130, 350, 50), 2)
+
+    def run(self, screen):
+        # ANIMATED FOR THE BLINKING CURSOR, REDRAWN ONLY WHEN THE TEXT INPUT CHANGED
+        return MENU_RUNNER.run(screen, self.draw, self.buttons, self.handle_events, animated=True,
+                               changed=lambda: self.text_input.changed)
 
-    center_x = Game.SCREEN_RESOLUTION[0]/2
-    center_y = Game.SCREEN_RESOLUTION[1]/2
+# PLAY SCREEN
+def play_game(screen):
+    # GAME INSTANCE
+    player = Player(Game.player_type)
+    game = Game(player)
 
-    pause_text = large_font.render("Paused", True, WHITE)
-    pause_text_rect = pause_text.get_rect()
-    pause_text_rect.center = (center_x, center_y)
+    # RUN GAME LOOP AND GET STATISTICS
+    stats = game.game_loop()
 
-    tip_text = small_font.render("Press ESC again to Continue", True, WHITE)
-    tip_text_rect = tip_text.get_rect()
-    tip_text_rect.center = (center_x, center_y + 50)
+    # GAME OVER SECTION
+    if stats is not None:
+        if Game.game_music:
+            audio.stop_music()
+        if Game.game_sounds:
+            audio.play('game_over')
 
-    return_btn = UIElement(
-        center_position=(150, 450),
-        font_size=20,
-        bg_rgb=BLUE,
-        text_rgb=WHITE,
-        text="Return to main menu",
-        action=GameState.TITLE,
-    )
+        SCREENS.game_over.start(stats, game.recording)
+        return SCREENS.game_over.show(screen)
+    else:
+        return GameState.TITLE
 
-    while Game.pause:
-        mouse_up = False
-        for event in pygame.event.get():
-            if event.type == pygame.MOUSEBUTTONUP and event.button == 1:
-                mouse_up = True
+# PAUSE SCREEN
+class PauseScreen(MenuScreen):
+    def build(self):
+        center_x = Game.SCREEN_RESOLUTION[0]/2
+        center_y = Game.SCREEN_RESOLUTION[1]/2
+
+        self.labels = [
+            Label("Paused", 80, (center_x, center_y)),
+            Label("Press ESC again to Continue", 15, (center_x, center_y + 50)),
+        ]
+        self.buttons = [return_button()]
 
+    def handle_events(self, events):
+        for event in events:
             if event.type == pygame.QUIT:
-                pygame.quit()
+                shutdown()
                 quit()
-            
+
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
                     Game.pause = False
-                    return      
-                    
-        screen.fill(BLUE)  
-        screen.blit(pause_text, pause_text_rect)
-        screen.blit(tip_text, tip_text_rect)
+                    return CLOSE
 
-        ui_action = return_btn.update(pygame.mouse.get_pos(), mouse_up)
-        if ui_action is not None:
-            if Game.game_sounds:
-                click_sound.play()
-
-            return ui_action
-        return_btn.draw(screen)
-
-        pygame.display.update()
-        pygame.display.flip()
+    def run(self, screen):
+        return MENU_RUNNER.run(screen, self.draw, self.buttons, self.handle_events)
 
 # VIEW OPTIONS SCREEN
-def options_screen(screen, music_toggle, sounds_toggle, diff_toggle, controls_toggle):
-    font = pygame.font.SysFont('courier', 30)
-    
-    options_text = font.render("Options", True, WHITE)
-    options_text_rect = options_text.get_rect()
-    options_text_rect.center = (Game.SCREEN_RESOLUTION[0]/2, 50)
-
-    music = "Music: ON"
-    sounds = "Sounds: ON"
-    diff = "Difficulty: EASY"
-    controls = "Controls: WASD keys"
-
-    if music_toggle:
-        music = "Music: ON"
-    else:
-        music = "Music: OFF"
-
-    if sounds_toggle:
-        sounds = "Sounds: ON"
-    else:
-        sounds = "Sounds: OFF"
-    
-    if diff_toggle:
-        diff = "Difficulty: HARD"
-    else:
-        diff = "Difficulty: EASY"
-
-    if controls_toggle:
-        controls = "Controls: ARROW keys"
-    else:
-        controls = "Controls: WASD keys"
-
-    return_btn = UIElement(
-        center_position=(150, 450),
-        font_size=20,
-        bg_rgb=BLUE,
-        text_rgb=WHITE,
-        text="Return to main menu",
-        action=GameState.TITLE,
+class OptionsScreen(MenuScreen):
+    # Game SETTING, (LABEL WHEN OFF, LABEL WHEN ON), BUTTON POSITION, ACTION
+    TOGGLES = (
+        ('game_sounds', ("Sounds: OFF", "Sounds: ON"), (380, 150), GameState.SOUND),
+        ('game_music', ("Music: OFF", "Music: ON"), (380, 200), GameState.MUSIC),
+        ('game_diff_hard', ("Difficulty: EASY", "Difficulty: HARD"), (380, 250), GameState.DIFF),
+        ('game_control_arrow_keys', ("Controls: WASD keys", "Controls: ARROW keys"), (380, 300), GameState.CONTROLS),
+        ('game_dense_mobs', ("Mobs: ONE AT A TIME", "Mobs: SWARM"), (380, 350), GameState.MOBS),
     )
-    sounds_btn = UIElement(
-        center_position=(380, 150),
-        font_size=20,
-        bg_rgb=BLUE,
-        text_rgb=WHITE,
-        text=sounds,
-        action=GameState.SOUND,
-    )
-    music_btn = UIElement(
-        center_position=(380, 200),
-        font_size=20,
-        bg_rgb=BLUE,
-        text_rgb=WHITE,
-        text=music,
-        action=GameState.MUSIC,
-    )
-    diff_btn = UIElement(
-        center_position=(380, 250),
-        font_size=20,
-        bg_rgb=BLUE,
-        text_rgb=WHITE,
-        text=diff,
-        action=GameState.DIFF,
-    )
-    controls_btn = UIElement(
-        center_position=(380, 300),
-        font_size=20,
-        bg_rgb=BLUE,
-        text_rgb=WHITE,
-        text=controls,
-        action=GameState.CONTROLS,
-    )
-
-    buttons = [sounds_btn, music_btn, diff_btn, controls_btn, return_btn]
-
-    while True:
-        mouse_up = False
-        events = pygame.event.get()
 
-        for event in events:
-            if event.type == pygame.MOUSEBUTTONUP and event.button == 1:
-                mouse_up = True
-
-        screen.fill(BLUE)
-        screen.blit(options_text, options_text_rect)
+    def build(self):
+        self.labels = [Label("Options", 30, (Game.SCREEN_RESOLUTION[0]/2, 50))]
 
-        for button in buttons:
-            ui_action = button.update(pygame.mouse.get_pos(), mouse_up)
-            if ui_action is not None:
-                if Game.game_sounds:
-                    click_sound.play()
+        self.toggles = []
+        for setting, texts, position, action in self.TOGGLES:
+            toggle_btn = UIElement(
+                center_position=position,
+                font_size=20,
+                bg_rgb=BLUE,
+                text_rgb=WHITE,
+                text=texts[bool(getattr(Game, setting))],
+                action=action,
+            )
+            self.toggles.append((toggle_btn, setting, texts))
 
-                return ui_action
-            button.draw(screen)
+        self.buttons = [toggle_btn for toggle_btn, _, _ in self.toggles] + [return_button()]
 
-        pygame.display.flip()
+    def refresh(self):
+        # ONLY THE TOGGLE THAT WAS CLICKED GETS A NEW LABEL
+        for toggle_btn, setting, texts in self.toggles:
+            toggle_btn.set_text(texts[bool(getattr(Game, setting))])
 
 # VIEW HIGH SCORE SCREEN
-def view_high_score_screen(screen):
-    small_font = pygame.font.SysFont('courier', 15)
-    semi_small_font = pygame.font.SysFont('courier', 20)
-    medium_font = pygame.font.SysFont('courier', 30)
-
-    center = Game.SCREEN_RESOLUTION[0]/2
-
-    view_scores_text = medium_font.render("Top 10 High Scores", True, WHITE)
-    view_scores_text_rect = view_scores_text.get_rect()
-    view_scores_text_rect.center = (center, 50)
-
-    records = db.query_scores(conn)
-    records_length = len(records)
-
-    # (Surface, Rect)
-    names = []
-    levels = []
-    scores = []
-
-    distance = 170
-    
-    # PLAYER NAME
-    player_name_label = semi_small_font.render("Player", True, WHITE)
-    player_name_label_rect = player_name_label.get_rect()
-    player_name_label_rect.center = (center - 200, 125)
-
-    # LEVEL
-    level_label = semi_small_font.render("Level", True, WHITE)
-    level_label_rect = level_label.get_rect()
-    level_label_rect.center = (center, 125)
-
-    # SCORE
-    score_label = semi_small_font.render("Score", True, WHITE)
-    score_label_rect = score_label.get_rect()
-    score_label_rect.center = (center + 200, 125)
-
-    # CROWNS
-    crown_1 = pygame.image.load('img/crown.png')
-    crown_1_rect = crown_1.get_rect()
-    crown_1_rect.center = (50, distance)
-
-    crown_2 = pygame.image.load('img/crown_2.png')
-    crown_2_rect = crown_2.get_rect()
-    crown_2_rect.center = (50, distance + 25)
-
-    crown_3 = pygame.image.load('img/crown_3.png')
-    crown_3_rect = crown_3.get_rect()
-    crown_3_rect.center = (50, distance + 50)
-
-    for record in records:
-        # PLAYER NAME SURFACES AND RECT
-        player_name = small_font.render(record[0], True, WHITE)
-        player_name_rect = player_name.get_rect()
-        player_name_rect.center = (center - 200, distance)
-        
-        # LEVEELS SURFACES AND RECT
-        level = small_font.render(str(record[1]), True, WHITE)
-        level_rect = level.get_rect()
-        level_rect.center = (center, distance)
-
-        # SCORE SURFACES AND RECT
-        score = small_font.render(str(record[2]), True, WHITE)
-        score_rect = score.get_rect()
-        score_rect.center = (center + 200, distance)
-
-        distance += 25
-
-        names.append((player_name, player_name_rect))
-        levels.append((level, level_rect))
-        scores.append((score, score_rect))
-    
-    return_btn = UIElement(
-        center_position=(150, 450),
-        font_size=20,
-        bg_rgb=BLUE,
-        text_rgb=WHITE,
-        text="Return to main menu",
-        action=GameState.TITLE,
-    )
-
-    while True:
-        mouse_up = False
-        events = pygame.event.get()
-
-        for event in events:
-            if event.type == pygame.MOUSEBUTTONUP and event.button == 1:
-                mouse_up = True
+class HighScoreScreen(MenuScreen):
+    def build(self):
+        center = Game.SCREEN_RESOLUTION[0]/2
+
+        self.title_label = Label("", 30, (center, 50))
+        self.labels = [
+            self.title_label,
+            Label("Player", 20, (center - 200, 125)),
+            Label("Level", 20, (center, 125)),
+            Label("Score", 20, (center + 200, 125)),
+        ]
 
-        screen.fill(BLUE)
-        screen.blit(view_scores_text, view_scores_text_rect)
-        
-        screen.blit(player_name_label, player_name_label_rect)
-        screen.blit(level_label, level_label_rect)
-        screen.blit(score_label, score_label_rect)
+        # CROWNS
+        self.crowns = []
+        for i, crown_image in enumerate(assets.CROWN_IMAGES):
+            crown = assets.load_image(crown_image)
+            self.crowns.append((crown, crown.get_rect(center=(50, 170 + 25 * i))))
+
+        # ONE ROW OF (NAME, LEVEL, SCORE) LABELS PER SCORE ON A PAGE
+        self.rows = []
+        for i in range(SCORES_PER_PAGE):
+            distance = 170 + 25 * i
+            self.rows.append((
+                Label("", 15, (center - 200, distance)),
+                Label("", 15, (center, distance)),
+                Label("", 15, (center + 200, distance)),
+            ))
+        self.row_count = 0
+        self.crown_count = 0
+
+        self.return_btn = return_button()
+        self.prev_page_btn = UIElement(
+            center_position=(550, 450),
+            font_size=20,
+            bg_rgb=BLUE,
+            text_rgb=WHITE,
+            text="<",
+            action=GameState.PREV_PAGE,
+        )
+        self.next_page_btn = UIElement(
+            center_position=(650, 450),
+            font_size=20,
+            bg_rgb=BLUE,
+            text_rgb=WHITE,
+            text=">",
+            action=GameState.NEXT_PAGE,
+        )
 
-        if records_length >= 1:
-            screen.blit(crown_1, crown_1_rect)
-        if records_length >= 2:
-            screen.blit(crown_2, crown_2_rect)
-        if records_length >= 3:
-            screen.blit(crown_3, crown_3_rect)
+    def set_page(self, rows, page_number, has_next_page):
+        first_page = page_number == 1
+        if first_page:
+            self.title_label.set_text(f"Top {SCORES_PER_PAGE} High Scores")
+        else:
+            self.title_label.set_text(f"High Scores - Page {page_number}")
+
+        # LABELS ARE ONLY RE-RENDERED WHERE THE TEXT CHANGED
+        for (name_label, level_label, score_label), (_, name, level, score) in zip(self.rows, rows):
+            name_label.set_text(name)
+            level_label.set_text(str(level))
+            score_label.set_text(str(score))
+        self.row_count = len(rows)
+        self.crown_count = len(rows) if first_page else 0
+
+        self.buttons = [self.return_btn]
+        if not first_page:
+            self.buttons.append(self.prev_page_btn)
+        if has_next_page:
+            self.buttons.append(self.next_page_btn)
 
-        # DISPLAY TOP 5 SCORES
-        for i in range(records_length):
-            screen.blit(names[i][0], names[i][1])
-            screen.blit(levels[i][0], levels[i][1])
-            screen.blit(scores[i][0], scores[i][1])
+    def draw(self, screen):
+        super().draw(screen)
+        for crown, crown_rect in self.crowns[:self.crown_count]:
+            screen.blit(crown, crown_rect)
 
-        ui_action = return_btn.update(pygame.mouse.get_pos(), mouse_up)
-        if ui_action is not None:
-            if Game.game_sounds:
-                click_sound.play()
+        # DISPLAY THE PAGE OF SCORES
+        for row in self.rows[:self.row_count]:
+            for label in row:
+                label.draw(screen)
 
-            return ui_action
-        return_btn.draw(screen)
+    def run(self, screen):
+        SCORE_WRITER.flush()
 
-        pygame.display.flip()
+        # KEYSET OF EVERY PAGE VISITED SO FAR (None IS THE FIRST PAGE)
+        pages = [None]
+        while True:
+            if pages[-1] is None:
+                rows = LEADERBOARD.top()
+            else:
+                rows = db.query_scores_page(conn, SCORES_PER_PAGE + 1, pages[-1])
+            has_next_page = len(rows) > SCORES_PER_PAGE
+            rows = rows[:SCORES_PER_PAGE]
+            self.set_page(rows, len(pages), has_next_page)
+
+            ui_action = MENU_RUNNER.run(screen, self.draw, self.buttons)
+            if ui_action == GameState.NEXT_PAGE:
+                pages.append(db.page_key(rows[-1]))
+            elif ui_action == GameState.PREV_PAGE:
+                pages.pop()
+            else:
+                return ui_action
 
 # TOGGLE MUSIC
 def toggle_music(game_music):
     if not game_music:
-        pygame.mixer.music.pause()
+        audio.pause_music()
     else:
-        pygame.mixer.music.unpause()
+        audio.unpause_music()
 
 # WINDOW PROPERTIES
 def set_window_properties():
-    pygame.display.set_caption("Dodge me Not")
-    icon = pygame.image.load('img/player/1.png')
-    pygame.display.set_icon(icon)
-
-# SHOW FINAL GAME RESULTS
-def display_end_game_result(stats, screen, saved):
-    score_font = pygame.font.SysFont('courier', 30)
-    user_text_font = pygame.font.SysFont('courier', 15)
-    save_text_font = pygame.font.SysFont('courier', 20)
-
-    game_over_text = score_font.render("GAME OVER", True, WHITE)
-    game_over_text_rect = game_over_text.get_rect()
-    game_over_text_rect.center = (380, 50)
-
-    user_text = user_text_font.render("Type your name and press Enter to Save", True, WHITE)
-    user_text_rect = user_text.get_rect()
-    user_text_rect.center = (380, 100)
-    
-    player_level = score_font.render("Level: " + str(stats[0]), True, WHITE)
-    player_level_rect = player_level.get_rect()
-    player_level_rect.center = (380, 250)
-
-    player_score = score_font.render("Score: " + str(stats[1]), True, WHITE)
-    player_score_rect = player_score.get_rect()
-    player_score_rect.center = (380, 290)
-    
-    saved_text = save_text_font.render("Saved", True, WHITE)
-    saved_text_rect = saved_text.get_rect()
-    saved_text_rect.center = (380, 350)
-
-    if saved:
-        screen.blit(saved_text, saved_text_rect)
-
-    screen.blit(game_over_text, game_over_text_rect)
-    screen.blit(user_text, user_text_rect)
-    screen.blit(player_level, player_level_rect)
-    screen.blit(player_score, player_score_rect)
+    icon = assets.player_image(1)
+    Game.DISPLAY.set_caption("Dodge me Not", icon)
 
 # CONFIRM EXIT SCREEN
-def confirm_quit_screen(screen):
-    font = pygame.font.SysFont('courier', 50)
-    center_x = Game.SCREEN_RESOLUTION[0]/2
-
-    exit_text = font.render("Confirm Exit?", True, WHITE)
-    exit_text_rect = exit_text.get_rect()
-    exit_text_rect.center = (center_x, 200)
-
-    yes_btn = UIElement(
-        center_position=(center_x - 100, 300),
-        font_size=30,
-        bg_rgb=BLUE,
-        text_rgb=WHITE,
-        text="Yes",
-        action=GameState.QUIT,
-    )
-
-    no_btn = UIElement(
-        center_position=(center_x + 100, 300),
-        font_size=30,
-        bg_rgb=BLUE,
-        text_rgb=WHITE,
-        text="No",
-        action=GameState.TITLE,
-    )
-
-    buttons = [yes_btn, no_btn]
-
-    while True:
-        mouse_up = False
-        events = pygame.event.get()
-
-        for event in events:
-            if event.type == pygame.MOUSEBUTTONUP and event.button == 1:
-                mouse_up = True
-
-        screen.fill(BLUE)
-        screen.blit(exit_text, exit_text_rect)
-
-        for button in buttons:
-            ui_action = button.update(pygame.mouse.get_pos(), mouse_up)
-            if ui_action is not None:
-                if Game.game_sounds:
-                    click_sound.play()
-
-                return ui_action
-            button.draw(screen)
+class ConfirmQuitScreen(MenuScreen):
+    def build(self):
+        center_x = Game.SCREEN_RESOLUTION[0]/2
+
+        self.labels = [Label("Confirm Exit?", 50, (center_x, 200))]
+
+        yes_btn = UIElement(
+            center_position=(center_x - 100, 300),
+            font_size=30,
+            bg_rgb=BLUE,
+            text_rgb=WHITE,
+            text="Yes",
+            action=GameState.QUIT,
+        )
+        no_btn = UIElement(
+            center_position=(center_x + 100, 300),
+            font_size=30,
+            bg_rgb=BLUE,
+            text_rgb=WHITE,
+            text="No",
+            action=GameState.TITLE,
+        )
 
-        pygame.display.flip()
+        self.buttons = [yes_btn, no_btn]
 
 # CREDITS
-def about_screen(screen):
-    small_font = pygame.font.SysFont('courier', 20)
-    smaller_font = pygame.font.SysFont('courier', 15)
-    medium_font = pygame.font.SysFont('courier', 30)
-    center_x = Game.SCREEN_RESOLUTION[0]/2
-
-    about_text = medium_font.render("About us", True, WHITE)
-    about_text_rect = about_text.get_rect()
-    about_text_rect.center = (center_x, 50)
-
-    sentence_1_text = small_font.render("This game is developed by", True, WHITE)
-    sentence_1_text_rect = sentence_1_text.get_rect()
-    sentence_1_text_rect.center = (center_x, 130)
-
-    group_logo = pygame.image.load("img/group_logo.png")
-    group_logo_rect = group_logo.get_rect()
-    group_logo_rect.center = (center_x, 230)
-
-    sentence_2_text = smaller_font.render("Game icons generated in: https://www.flaticon.com", True, WHITE)
-    sentence_2_text_rect = sentence_2_text.get_rect()
-    sentence_2_text_rect.center = (center_x, 340)
-
-    sentence_3_text = smaller_font.render("Game music credits: 8 Bit Universe (YouTube)", True, WHITE)
-    sentence_3_text_rect = sentence_3_text.get_rect()
-    sentence_3_text_rect.center = (center_x, 370)
-
-    sentence_4_text = smaller_font.render("Background image credits: https://www.pinterest.com (Pinterest)", True, WHITE)
-    sentence_4_text_rect = sentence_4_text.get_rect()
-    sentence_4_text_rect.center = (center_x, 400)
-
-    return_btn = UIElement(
-        center_position=(150, 450),
-        font_size=20,
-        bg_rgb=BLUE,
-        text_rgb=WHITE,
-        text="Return to main menu",
-        action=GameState.TITLE,
-    )
-
-    while True:
-        mouse_up = False
-        events = pygame.event.get()
-
-        for event in events:
-            if event.type == pygame.MOUSEBUTTONUP and event.button == 1:
-                mouse_up = True
-
-        screen.fill(BLUE)
-        screen.blit(about_text, about_text_rect)
-        screen.blit(sentence_1_text, sentence_1_text_rect)
-        screen.blit(group_logo, group_logo_rect)
-        screen.blit(sentence_2_text, sentence_2_text_rect)
-        screen.blit(sentence_3_text, sentence_3_text_rect)
-        screen.blit(sentence_4_text, sentence_4_text_rect)
-        
-        ui_action = return_btn.update(pygame.mouse.get_pos(), mouse_up)
-        if ui_action is not None:
-            if Game.game_sounds:
-                click_sound.play()
-
-            return ui_action
-        return_btn.draw(screen)
+class AboutScreen(MenuScreen):
+    def build(self):
+        center_x = Game.SCREEN_RESOLUTION[0]/2
+
+        self.labels = [
+            Label("About us", 30, (center_x, 50)),
+            Label("This game is developed by", 20, (center_x, 130)),
+            Label("Game icons generated in: https://www.flaticon.com", 15, (center_x, 340)),
+            Label("Game music credits: 8 Bit Universe (YouTube)", 15, (center_x, 370)),
+            Label("Background image credits: https://www.pinterest.com (Pinterest)", 15, (center_x, 400)),
+        ]
 
-        pygame.display.flip()
+        group_logo = assets.load_image(assets.GROUP_LOGO_IMAGE)
+        self.images.append((group_logo, group_logo.get_rect(center=(center_x, 230))))
+
+        self.buttons = [return_button()]
+
+# SCREEN MANAGER
+class ScreenManager():
+    """ One instance of every menu screen for the whole session, looked up by GameState """
+
+    def __init__(self):
+        self.title = TitleScreen()
+        self.game_over = GameOverScreen()
+        self.pause = PauseScreen()
+        self.options = OptionsScreen()
+        self.high_scores = HighScoreScreen()
+        self.confirm_quit = ConfirmQuitScreen()
+        self.about = AboutScreen()
+
+        self.screens = {
+            GameState.TITLE: self.title,
+            GameState.OPTIONS: self.options,
+            GameState.VIEWSCORES: self.high_scores,
+            GameState.CONFIRM_QUIT: self.confirm_quit,
+            GameState.ABOUT: self.about,
+        }
+
+    def show(self, game_state, screen):
+        """ Runs the screen of game_state and returns the next GameState """
+        return self.screens[game_state].show(screen)
+
+# SCREENS ARE BUILT ON FIRST SHOW, AFTER init_app
+SCREENS = ScreenManager()
+
+""" APPLICATION BOOTSTRAP """
+
+# START THE MUSIC ONCE THE AUDIO LOADER IS DONE
+def start_music():
+    if Game.game_music:
+        audio.play_music()
+
+# DATABASE
+def init_database():
+    global conn, LEADERBOARD, SCORE_WRITER
+
+    # CREATE TABLE IF FIRST TIME RUNNING
+    conn = db.create_connection(db.db_file)
+    db.create_table(conn, db.create_table_sql)
+    db.migrate(conn)
+
+    # TOP SCORES KEPT IN MEMORY (ONE EXTRA TO KNOW IF THERE IS A SECOND PAGE)
+    LEADERBOARD = LeaderboardCache(conn, SCORES_PER_PAGE + 1)
+
+    # SCORES ARE SAVED ON A BACKGROUND THREAD
+    SCORE_WRITER = ScoreWriter(db.db_file)
+
+def init_app():
+    """ Opens the window, audio and database. Importing this module does none of it """
+    PROFILER.configure_from_env()
+
+    with PROFILER.startup_phase('display_init'):
+        pygame.display.init()
+
+    # AUDIO DEVICE, THEN DECODING ON A WORKER WHILE THE REST STARTS UP
+    with PROFILER.startup_phase('mixer_init'):
+        audio.load_async(on_ready=start_music)
+
+    with PROFILER.startup_phase('font_init'):
+        pygame.font.init()
+        pygame.freetype.init()
+    with PROFILER.startup_phase('set_mode'):
+        Game.DISPLAY = display_backend.open_display(Game.SCREEN_RESOLUTION)
+        Game.dirty_rendering = os.environ.get('DODGE_DIRTY_RENDERING') == '1'
+        Game.SCREEN = Game.DISPLAY.surface
+        MENU_RUNNER.display = Game.DISPLAY
+        set_window_properties()
+
+    # DECODE AND CONVERT ALL IMAGES ONCE
+    with PROFILER.startup_phase('image_preload'):
+        assets.preload_images()
+        assets.sprite_atlas()
+        assets.background_streamer().on_evict = Game.DISPLAY.forget  # drops their textures too
+
+    with PROFILER.startup_phase('db_connect'):
+        init_database()
+
+    # WHAT WAS LOADED SO FAR LIVES FOR THE WHOLE SESSION, KEEP IT OUT OF EVERY COLLECTION
+    gc.collect()
+    gc.freeze()
+
+def shutdown():
+    """ Saves pending scores and closes everything init_app opened """
+    if SCORE_WRITER is not None:
+        SCORE_WRITER.close()
+    PROFILER.finish_from_env()
+    if Game.DISPLAY is not None:
+        Game.DISPLAY.close()
+    pygame.quit()
 
 """ MAIN DRIVER """
 def main():
-    pygame.init()
-
-    set_window_properties()
+    init_app()
 
     # INITIAL GAME STATE
     game_state = GameState.TITLE
@@ -994,20 +1087,19 @@ def main():
     running = True
     while running:
         if game_state == GameState.TITLE:
-            game_state = title_screen(Game.SCREEN)
+            game_state = SCREENS.show(GameState.TITLE, Game.SCREEN)
 
         if game_state == GameState.NEWGAME:
             game_state = play_game(Game.SCREEN)
 
         if game_state == GameState.OPTIONS:
-            game_state = options_screen(Game.SCREEN, Game.game_music, Game.game_sounds, 
-                                        Game.game_diff_hard, Game.game_control_arrow_keys)
+            game_state = SCREENS.show(GameState.OPTIONS, Game.SCREEN)
 
         if game_state == GameState.VIEWSCORES:
-            game_state = view_high_score_screen(Game.SCREEN)
+            game_state = SCREENS.show(GameState.VIEWSCORES, Game.SCREEN)
 
         if game_state == GameState.ABOUT:
-            game_state = about_screen(Game.SCREEN)
+            game_state = SCREENS.show(GameState.ABOUT, Game.SCREEN)
 
         if game_state == GameState.PREV:
             if Game.player_type == 1:
@@ -1046,11 +1138,15 @@ def main():
             Game.game_control_arrow_keys = not Game.game_control_arrow_keys
             game_state = GameState.OPTIONS
 
+        if game_state == GameState.MOBS:
+            Game.game_dense_mobs = not Game.game_dense_mobs
+            game_state = GameState.OPTIONS
+
         if game_state == GameState.CONFIRM_QUIT:
-            game_state = confirm_quit_screen(Game.SCREEN)
+            game_state = SCREENS.show(GameState.CONFIRM_QUIT, Game.SCREEN)
 
         if game_state == GameState.QUIT:
-            pygame.quit()
+            shutdown()
             return
 
 # CALL MAIN WHEN SCRIPT IS RUNNING
@@ -0,0 +1,42 @@
+import db_configurations as db
+
+
+class LeaderboardCache:
+    """ The top scores, kept in memory until the database changes.
+
+        Every commit by another connection changes PRAGMA data_version on
+        this one, whether it comes from the game's own ScoreWriter or from
+        another process (inserts, but also scores deleted or edited). The
+        top scores are then read again: one index range scan of size rows.
+        When nothing changed, opening the scores screen costs that one
+        PRAGMA and no read of the table.
+    """
+
+    def __init__(self, conn, size=10):
+        """
+        Args:
+            conn - connection used for reads (owned by the calling thread)
+            size - int, how many of the top scores to keep
+        """
+        self.conn = conn
+        self.size = size
+
+        self.rows = []  # [(id, player_name, level, score)], best first
+        self.data_version = None
+        self.load()
+
+    def load(self):
+        """ (Re)reads the top scores from the database """
+        # data_version first: anything committed after it is picked up by refresh
+        self.data_version = db.query_data_version(self.conn)
+        self.rows = db.query_scores_page(self.conn, self.size)
+
+    def refresh(self):
+        """ Reloads the top scores if another connection committed since the last check """
+        if db.query_data_version(self.conn) != self.data_version:
+            self.load()
+
+    def top(self, limit=None):
+        """ Top scores as (id, player_name, level, score), best first """
+        self.refresh()
+        return list(self.rows) if limit is None else self.rows[:limit]
@@ -0,0 +1,248 @@
+"""
+Frame-time and startup instrumentation.
+
+Disabled by default; while disabled section() hands out one shared no-op
+context manager, so instrumented code pays a function call per phase.
+
+Environment variables:
+    DODGE_PROFILE=1            time game loop phases, screens and startup
+    DODGE_PROFILE_OVERLAY=1    also draw the rolling percentiles on screen
+    DODGE_PROFILE_DUMP=path    write the stats on exit (.json or .csv)
+    DODGE_CPROFILE=path        run the whole session under cProfile
+
+Hotkeys (any time):
+    F3   toggle profiling and the overlay
+    F9   dump the stats to profile.json
+    F10  start / stop a cProfile capture (written to profile.prof)
+"""
+
+import cProfile
+import csv
+import json
+import os
+import time
+from collections import deque
+
+import pygame
+
+import font_cache as fonts
+
+# DEFAULTS
+WINDOW = 600  # samples kept per section (10 s of frames at 60 FPS)
+PERCENTILES = (50, 95, 99)
+OVERLAY_REFRESH = 0.25  # seconds between overlay text updates
+DUMP_FILE = 'profile.json'
+CPROFILE_FILE = 'profile.prof'
+
+# HOTKEYS
+OVERLAY_KEY = pygame.K_F3
+DUMP_KEY = pygame.K_F9
+CPROFILE_KEY = pygame.K_F10
+
+
+class _NullSection:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULL_SECTION = _NullSection()
+
+
+class _Section:
+    """ Times one named phase, reused every time the phase runs """
+
+    def __init__(self, samples):
+        self.samples = samples
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.samples.append(time.perf_counter() - self.start)
+        return False
+
+
+class _StartupSection:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record_startup(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def percentile(ordered, p):
+    """ Nearest-rank percentile of an already sorted list """
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+class Profiler:
+    """ Rolling per-phase timings plus one-off startup timings """
+
+    def __init__(self, enabled=False, window=WINDOW):
+        self.enabled = enabled
+        self.window = window
+        self.overlay = False
+
+        self.samples = {}   # name -> deque of seconds
+        self.sections = {}  # name -> _Section
+        self.startup = {}   # name -> seconds
+
+        self.cprofile = None
+        self.overlay_lines = []
+        self.overlay_time = 0.0
+
+    def section(self, name):
+        """ Context manager timing a phase, e.g. with PROFILER.section('draw_background') """
+        if not self.enabled:
+            return NULL_SECTION
+
+        section = self.sections.get(name)
+        if section is None:
+            samples = deque(maxlen=self.window)
+            self.samples[name] = samples
+            section = _Section(samples)
+            self.sections[name] = section
+        return section
+
+    def record(self, name, seconds):
+        """ Adds a sample measured by the caller """
+        if self.enabled:
+            self.section(name).samples.append(seconds)
+
+    def record_startup(self, name, seconds):
+        if self.enabled:
+            self.startup[name] = seconds
+
+    def startup_phase(self, name):
+        """ Context manager timing a one-off startup phase """
+        if not self.enabled:
+            return NULL_SECTION
+        return _StartupSection(self, name)
+
+    def summary(self):
+        """ {name: {count, mean, p50, p95, p99, max}} in milliseconds """
+        stats = {}
+        for name, samples in self.samples.items():
+            ordered = sorted(samples)
+            if not ordered:
+                continue
+            row = {'count': len(ordered), 'mean': sum(ordered) / len(ordered) * 1000}
+            for p in PERCENTILES:
+                row[f'p{p}'] = percentile(ordered, p) * 1000
+            row['max'] = ordered[-1] * 1000
+            stats[name] = row
+        return stats
+
+    # DUMPS
+    def dump(self, path=DUMP_FILE):
+        """ Writes the stats as JSON, or CSV if path ends with .csv """
+        summary = self.summary()
+        startup = {name: seconds * 1000 for name, seconds in self.startup.items()}
+
+        if path.endswith('.csv'):
+            columns = ['count', 'mean'] + [f'p{p}' for p in PERCENTILES] + ['max']
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['section'] + columns)
+                for name, row in sorted(summary.items()):
+                    writer.writerow([name] + [round(row[column], 4) for column in columns])
+                for name, ms in sorted(startup.items()):
+                    writer.writerow([f'startup.{name}', 1, round(ms, 4)] + [''] * (len(columns) - 2))
+        else:
+            with open(path, 'w') as f:
+                json.dump({'frame_ms': summary, 'startup_ms': startup}, f, indent=2, sort_keys=True)
+        print(f'profile written to {path}')
+
+    def start_cprofile(self):
+        if self.cprofile is None:
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+
+    def stop_cprofile(self, path=CPROFILE_FILE):
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            self.cprofile.dump_stats(path)
+            self.cprofile = None
+            print(f'cProfile written to {path}')
+
+    # HOTKEYS AND OVERLAY
+    def handle_event(self, event):
+        """ Reacts to the profiler hotkeys, returns True if the event was one """
+        if event.type != pygame.KEYDOWN:
+            return False
+
+        if event.key == OVERLAY_KEY:
+            self.overlay = not self.overlay
+            self.enabled = self.enabled or self.overlay
+        elif event.key == DUMP_KEY:
+            self.dump()
+        elif event.key == CPROFILE_KEY:
+            if self.cprofile is None:
+                self.start_cprofile()
+            else:
+                self.stop_cprofile()
+        else:
+            return False
+        return True
+
+    def draw_overlay(self, surface):
+        """ Draws p50/p95/p99 per section, returns the rect drawn or None """
+        if not self.overlay:
+            return None
+
+        now = time.perf_counter()
+        if now - self.overlay_time > OVERLAY_REFRESH:
+            self.overlay_time = now
+            self.overlay_lines = [
+                f"{name[:18]:18} {row['p50']:6.2f} {row['p95']:6.2f} {row['p99']:6.2f}"
+                for name, row in sorted(self.summary().items())
+            ]
+
+        lines = [fonts.render_text(line, 12, (255, 255, 0))
+                 for line in ["section             p50    p95    p99 ms"] + self.overlay_lines]
+        width = max(line.get_width() for line in lines) + 8
+        height = sum(line.get_height() for line in lines) + 8
+
+        rect = pygame.Rect(4, 4, width, height)
+        surface.fill((0, 0, 0), rect)
+        y = rect.y + 4
+        for line in lines:
+            surface.blit(line, (rect.x + 4, y))
+            y += line.get_height()
+        return rect
+
+    # ENVIRONMENT
+    def configure_from_env(self, environ=os.environ):
+        """ Applies the DODGE_* environment variables (see module docstring) """
+        if environ.get('DODGE_PROFILE') == '1':
+            self.enabled = True
+        if environ.get('DODGE_PROFILE_OVERLAY') == '1':
+            self.enabled = True
+            self.overlay = True
+        if environ.get('DODGE_CPROFILE'):
+            self.start_cprofile()
+
+    def finish_from_env(self, environ=os.environ):
+        """ Writes the dumps requested through the environment, call on exit """
+        if environ.get('DODGE_CPROFILE'):
+            self.stop_cprofile(environ['DODGE_CPROFILE'])
+        if environ.get('DODGE_PROFILE_DUMP') and self.enabled:
+            self.dump(environ['DODGE_PROFILE_DUMP'])
+
+
+# SHARED INSTANCE
+PROFILER = Profiler()
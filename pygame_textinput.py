@@ -8,8 +8,6 @@ import os.path
 import pygame
 import pygame.locals as pl
 
-pygame.font.init()
-
 
 class TextInput:
     """
@@ -41,6 +39,9 @@ class TextInput:
         :param max_string_length: Allowed length of text
         """
 
+        if not pygame.font.get_init():
+            pygame.font.init()
+
         # Text related vars:
         self.antialias = antialias
         self.text_color = text_color
@@ -57,6 +58,11 @@ class TextInput:
         # Text-surface will be created during the first update call:
         self.surface = pygame.Surface((1, 1))
         self.surface.set_alpha(0)
+        self.text_surface = self.surface
+        self.rendered_string = None  # text in self.text_surface
+        self.rendered_state = None  # (text, cursor position, cursor visible) in self.surface
+        self.changed = False  # whether the last update changed the surface
+        self.text_widths = {}  # {text before the cursor: width in pixels}
 
         # Vars to make keydowns repeat after user pressed a key for some time:
         self.keyrepeat_counters = {}  # {event.key: (counter_int, event.unicode)} (look for "***")
@@ -74,6 +80,16 @@ class TextInput:
         self.clock = pygame.time.Clock()
 
     def update(self, events):
+        self.clock.tick()
+        elapsed_ms = self.clock.get_time()
+
+        # Key repeat is applied directly on a timer, instead of posting KEYDOWN events to the queue:
+        for key, counter in self.keyrepeat_counters.items():
+            counter[0] += elapsed_ms
+            if counter[0] >= self.keyrepeat_intial_interval_ms:
+                counter[0] = self.keyrepeat_intial_interval_ms - self.keyrepeat_interval_ms
+                self._press_key(key, counter[1])
+
         for event in events:
             if event.type == pygame.KEYDOWN:
                 self.cursor_visible = True  # So the user sees where he writes
@@ -83,86 +99,100 @@ class TextInput:
                     if not event.key == pl.K_RETURN: # Filters out return key, others can be added as necessary
                         self.keyrepeat_counters[event.key] = [0, event.unicode]
 
-                if event.key == pl.K_BACKSPACE:
-                    self.input_string = (
-                        self.input_string[:max(self.cursor_position - 1, 0)]
-                        + self.input_string[self.cursor_position:]
-                    )
-
-                    # Subtract one from cursor_pos, but do not go below zero:
-                    self.cursor_position = max(self.cursor_position - 1, 0)
-                elif event.key == pl.K_DELETE:
-                    self.input_string = (
-                        self.input_string[:self.cursor_position]
-                        + self.input_string[self.cursor_position + 1:]
-                    )
-
-                elif event.key == pl.K_RETURN:
+                if self._press_key(event.key, event.unicode):
                     return True
 
-                elif event.key == pl.K_RIGHT:
-                    # Add one to cursor_pos, but do not exceed len(input_string)
-                    self.cursor_position = min(self.cursor_position + 1, len(self.input_string))
-
-                elif event.key == pl.K_LEFT:
-                    # Subtract one from cursor_pos, but do not go below zero:
-                    self.cursor_position = max(self.cursor_position - 1, 0)
-
-                elif event.key == pl.K_END:
-                    self.cursor_position = len(self.input_string)
-
-                elif event.key == pl.K_HOME:
-                    self.cursor_position = 0
-
-                elif len(self.input_string) < self.max_string_length or self.max_string_length == -1:
-                    # If no special key is pressed, add unicode of key to input_string
-                    self.input_string = (
-                        self.input_string[:self.cursor_position]
-                        + event.unicode
-                        + self.input_string[self.cursor_position:]
-                    )
-                    self.cursor_position += len(event.unicode)  # Some are empty, e.g. K_UP
-
             elif event.type == pl.KEYUP:
                 # *** Because KEYUP doesn't include event.unicode, this dict is stored in such a weird way
                 if event.key in self.keyrepeat_counters:
                     del self.keyrepeat_counters[event.key]
 
-        # Update key counters:
-        for key in self.keyrepeat_counters:
-            self.keyrepeat_counters[key][0] += self.clock.get_time()  # Update clock
+        # Update self.cursor_visible
+        self.cursor_ms_counter += elapsed_ms
+        if self.cursor_ms_counter >= self.cursor_switch_ms:
+            self.cursor_ms_counter %= self.cursor_switch_ms
+            self.cursor_visible = not self.cursor_visible
+
+        # Re-render only if the text, the cursor or its blink state changed:
+        state = (self.input_string, self.cursor_position, self.cursor_visible)
+        self.changed = state != self.rendered_state
+        if self.changed:
+            self._render()
+            self.rendered_state = state
+        return False
 
-            # Generate new key events if enough time has passed:
-            if self.keyrepeat_counters[key][0] >= self.keyrepeat_intial_interval_ms:
-                self.keyrepeat_counters[key][0] = (
-                    self.keyrepeat_intial_interval_ms
-                    - self.keyrepeat_interval_ms
-                )
+    def _press_key(self, key, unicode):
+        """ Applies one key press, returns True for return """
+        if key == pl.K_BACKSPACE:
+            self.input_string = (
+                self.input_string[:max(self.cursor_position - 1, 0)]
+                + self.input_string[self.cursor_position:]
+            )
+
+            # Subtract one from cursor_pos, but do not go below zero:
+            self.cursor_position = max(self.cursor_position - 1, 0)
+        elif key == pl.K_DELETE:
+            self.input_string = (
+                self.input_string[:self.cursor_position]
+                + self.input_string[self.cursor_position + 1:]
+            )
+
+        elif key == pl.K_RETURN:
+            return True
+
+        elif key == pl.K_RIGHT:
+            # Add one to cursor_pos, but do not exceed len(input_string)
+            self.cursor_position = min(self.cursor_position + 1, len(self.input_string))
+
+        elif key == pl.K_LEFT:
+            # Subtract one from cursor_pos, but do not go below zero:
+            self.cursor_position = max(self.cursor_position - 1, 0)
+
+        elif key == pl.K_END:
+            self.cursor_position = len(self.input_string)
+
+        elif key == pl.K_HOME:
+            self.cursor_position = 0
+
+        elif len(self.input_string) < self.max_string_length or self.max_string_length == -1:
+            # If no special key is pressed, add unicode of key to input_string
+            self.input_string = (
+                self.input_string[:self.cursor_position]
+                + unicode
+                + self.input_string[self.cursor_position:]
+            )
+            self.cursor_position += len(unicode)  # Some are empty, e.g. K_UP
+        return False
 
-                event_key, event_unicode = key, self.keyrepeat_counters[key][1]
-                pygame.event.post(pygame.event.Event(pl.KEYDOWN, key=event_key, unicode=event_unicode))
+    def _text_width(self, string):
+        """ Width of string in pixels, measured once per string
+            (summing single glyph widths drifts, the font positions glyphs in sub-pixels)
+        """
+        width = self.text_widths.get(string)
+        if width is None:
+            width = self.text_widths[string] = self.font_object.size(string)[0]
+        return width
 
-        # Re-render text surface:
+    def _render(self):
         string = self.input_string
         if self.password:
             string = "*" * len(self.input_string)
-        self.surface = self.font_object.render(string, self.antialias, self.text_color)
 
-        # Update self.cursor_visible
-        self.cursor_ms_counter += self.clock.get_time()
-        if self.cursor_ms_counter >= self.cursor_switch_ms:
-            self.cursor_ms_counter %= self.cursor_switch_ms
-            self.cursor_visible = not self.cursor_visible
+        # The font only renders when the text itself changed, not for cursor moves or blinks:
+        if string != self.rendered_string:
+            self.text_surface = self.font_object.render(string, self.antialias, self.text_color)
+            self.rendered_string = string
 
-        if self.cursor_visible:
-            cursor_y_pos = self.font_object.size(self.input_string[:self.cursor_position])[0]
-            # Without this, the cursor is invisible when self.cursor_position > 0:
-            if self.cursor_position > 0:
-                cursor_y_pos -= self.cursor_surface.get_width()
-            self.surface.blit(self.cursor_surface, (cursor_y_pos, 0))
+        if not self.cursor_visible:
+            self.surface = self.text_surface
+            return
 
-        self.clock.tick()
-        return False
+        self.surface = self.text_surface.copy()
+        cursor_y_pos = self._text_width(string[:self.cursor_position])
+        # Without this, the cursor is invisible when self.cursor_position > 0:
+        if self.cursor_position > 0:
+            cursor_y_pos -= self.cursor_surface.get_width()
+        self.surface.blit(self.cursor_surface, (cursor_y_pos, 0))
 
     def get_surface(self):
         return self.surface
@@ -175,13 +205,19 @@ class TextInput:
 
     def set_text_color(self, color):
         self.text_color = color
+        self.rendered_string = self.rendered_state = None
 
     def set_cursor_color(self, color):
         self.cursor_surface.fill(color)
+        self.rendered_state = None
 
     def clear_text(self):
         self.input_string = ""
         self.cursor_position = 0
+        self.text_widths.clear()
+        # Keys held before clearing must not repeat into the new text, nor count the time in between:
+        self.keyrepeat_counters.clear()
+        self.clock.tick()
 
 
 
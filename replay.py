@@ -0,0 +1,379 @@
+"""
+Deterministic recording and replay of runs.
+
+The simulation is fully determined by its starting parameters (RNG seed,
+difficulty, speed and sprite sizes) and the input of every tick, so that
+is all a recording holds (plus whether hitboxes are pixel masks, which
+come from the sprites of the player type, and whether collision is
+swept). Inputs are packed into a 4-bit mask per tick and run-length
+encoded, which keeps a half hour game in a few kilobytes.
+
+Replaying steps the simulation as fast as possible, without a display, to
+verify a submitted score or re-run a regression scenario:
+
+    python replay.py replays/some_run.dmr                      # print the result
+    python replay.py replays/some_run.dmr --verify 3 1520      # level, points
+    python replay.py replays/some_run.dmr --render --speed 4   # watch it
+"""
+
+import argparse
+import os
+import struct
+import sys
+import time
+
+import simulation as sim
+
+# FILE FORMAT
+MAGIC = b'DMNR'
+VERSION = 3
+HEADER = struct.Struct('<4sBBBdIHHB')  # magic, version, hard, player type, speed, seed, player w/h, mob count
+SCHEDULER = struct.Struct('<HH')        # max mobs, spawn interval (version 2 on)
+FLAGS = struct.Struct('<B')             # flag bits below (version 3 on)
+MOB_SIZE = struct.Struct('<BHH')        # mob type, width, height
+RESULT = struct.Struct('<IIIBB')        # ticks, level, points, over, death cause (0 = none)
+RUN_COUNT = struct.Struct('<I')
+REPLAY_DIR = 'replays'
+EXTENSION = '.dmr'
+
+# FLAG BITS
+PIXEL_COLLISION = 1
+CONTINUOUS_COLLISION = 2
+
+# INPUT BITS
+MOVE_LEFT = 1
+MOVE_RIGHT = 2
+JUMP = 4
+MOVE_DOWN = 8
+
+# ONE SHARED Inputs PER MASK, SO REPLAYING ALLOCATES NOTHING PER TICK
+INPUTS = tuple(sim.Inputs(bool(mask & MOVE_LEFT), bool(mask & MOVE_RIGHT),
+                          bool(mask & JUMP), bool(mask & MOVE_DOWN)) for mask in range(16))
+
+
+class ReplayError(Exception):
+    """ The file is not a recording this version can read, or not one the game could have played """
+
+
+def input_mask(inputs):
+    return ((MOVE_LEFT if inputs.move_left else 0) | (MOVE_RIGHT if inputs.move_right else 0)
+            | (JUMP if inputs.jump else 0) | (MOVE_DOWN if inputs.move_down else 0))
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _read_varint(data, offset):
+    value = 0
+    shift = 0
+    while True:
+        if offset >= len(data):
+            raise ReplayError('truncated recording')
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+class Recording:
+    """ Starting parameters of a run plus its run-length encoded inputs """
+
+    def __init__(self, seed, hard, game_speed, player_size, mob_sizes, player_type=1,
+                 max_mobs=sim.MAX_MOBS, spawn_interval=sim.SPAWN_INTERVAL, pixel_collision=False,
+                 continuous_collision=False):
+        """
+        Args:
+            seed - int, the state's RNG seed before the first step
+            hard - bool, hard difficulty
+            game_speed - starting scroll speed
+            player_size - (width, height) of the player sprite
+            mob_sizes - dict {mob_type: (width, height)}
+            player_type - int, which player sprite to show when rendering
+            max_mobs, spawn_interval - the spawn scheduler's settings
+            pixel_collision - bool, hitboxes are the sprites' masks (simulation.Hitboxes)
+            continuous_collision - bool, swept collision (SimState.continuous)
+        """
+        self.seed = seed
+        self.hard = hard
+        self.game_speed = game_speed
+        self.player_size = tuple(player_size)
+        self.mob_sizes = {mob_type: tuple(size) for mob_type, size in mob_sizes.items()}
+        self.player_type = player_type
+        self.max_mobs = max_mobs
+        self.spawn_interval = spawn_interval
+        self.pixel_collision = pixel_collision
+        self.continuous_collision = continuous_collision
+        self.version = VERSION  # of the file it was read from
+
+        self.runs = []  # [[input mask, ticks]]
+        self.ticks = 0
+        self.result = None  # (level, points, over, death cause) once finished
+
+    @classmethod
+    def start(cls, state, player_type=1):
+        """ A recording of state, which must not have been stepped yet """
+        return cls(state.seed, state.hard, state.game_speed, (state.player.width, state.player.height),
+                   state.mob_sizes, player_type, state.max_mobs, state.spawn_interval,
+                   state.hitboxes is not None, state.continuous)
+
+    def new_game(self):
+        """ The state the recorded run started from """
+        hitboxes = None
+        if self.pixel_collision:
+            import asset_manager as assets
+            hitboxes = sim.Hitboxes(*assets.sprite_masks(self.player_type))
+        return sim.new_game(self.player_size, self.mob_sizes, self.hard, self.game_speed, self.seed,
+                            self.max_mobs, self.spawn_interval, hitboxes, self.continuous_collision)
+
+    def append(self, inputs):
+        """ Records the inputs of one step """
+        mask = input_mask(inputs)
+        if self.runs and self.runs[-1][0] == mask:
+            self.runs[-1][1] += 1
+        else:
+            self.runs.append([mask, 1])
+        self.ticks += 1
+
+    def finish(self, state):
+        self.result = (state.level, state.points, state.over, state.death_cause)
+
+    def inputs(self):
+        """ Yields the Inputs of every recorded step """
+        for mask, count in self.runs:
+            inputs = INPUTS[mask]
+            for _ in range(count):
+                yield inputs
+
+    # ENCODING
+    def to_bytes(self):
+        out = bytearray(HEADER.pack(MAGIC, VERSION, self.hard, self.player_type, self.game_speed,
+                                    self.seed, *self.player_size, len(self.mob_sizes)))
+        out += SCHEDULER.pack(self.max_mobs, self.spawn_interval)
+        out += FLAGS.pack((PIXEL_COLLISION if self.pixel_collision else 0)
+                          | (CONTINUOUS_COLLISION if self.continuous_collision else 0))
+        for mob_type, (width, height) in sorted(self.mob_sizes.items()):
+            out += MOB_SIZE.pack(mob_type, width, height)
+
+        level, points, over, death_cause = self.result or (0, 0, False, None)
+        out += RESULT.pack(self.ticks, level, points, over, death_cause or 0)
+
+        out += RUN_COUNT.pack(len(self.runs))
+        for mask, count in self.runs:
+            out.append(mask)
+            _write_varint(out, count)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) < HEADER.size or data[:4] != MAGIC:
+            raise ReplayError('not a recording')
+        magic, version, hard, player_type, game_speed, seed, width, height, mob_count = HEADER.unpack_from(data)
+        if version > VERSION:
+            raise ReplayError(f'unsupported recording version {version}')
+
+        offset = HEADER.size
+        max_mobs, spawn_interval = sim.MAX_MOBS, sim.SPAWN_INTERVAL
+        if version >= 2:
+            max_mobs, spawn_interval = SCHEDULER.unpack_from(data, offset)
+            offset += SCHEDULER.size
+        flags = 0
+        if version >= 3:
+            (flags,) = FLAGS.unpack_from(data, offset)
+            offset += FLAGS.size
+        mob_sizes = {}
+        for _ in range(mob_count):
+            mob_type, mob_width, mob_height = MOB_SIZE.unpack_from(data, offset)
+            mob_sizes[mob_type] = (mob_width, mob_height)
+            offset += MOB_SIZE.size
+
+        recording = cls(seed, bool(hard), game_speed, (width, height), mob_sizes, player_type,
+                        max_mobs, spawn_interval, bool(flags & PIXEL_COLLISION),
+                        bool(flags & CONTINUOUS_COLLISION))
+        recording.version = version
+        ticks, level, points, over, death_cause = RESULT.unpack_from(data, offset)
+        offset += RESULT.size
+        if level:
+            recording.result = (level, points, bool(over), death_cause or None)
+
+        (run_count,) = RUN_COUNT.unpack_from(data, offset)
+        offset += RUN_COUNT.size
+        for _ in range(run_count):
+            if offset >= len(data):
+                raise ReplayError('truncated recording')
+            mask = data[offset]
+            count, offset = _read_varint(data, offset + 1)
+            recording.runs.append([mask & 0xF, count])
+            recording.ticks += count
+
+        if recording.ticks != ticks:
+            raise ReplayError('corrupt recording')
+        return recording
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+
+def save_recording(recording, player_name, directory=REPLAY_DIR):
+    """ Stores a finished game's recording next to the others, returns the path """
+    os.makedirs(directory, exist_ok=True)
+    points = recording.result[1] if recording.result else 0
+    safe_name = ''.join(char if char.isalnum() else '_' for char in player_name)
+    path = os.path.join(directory, f'{time.strftime("%Y%m%d-%H%M%S")}_{safe_name}_{points}{EXTENSION}')
+    recording.save(path)
+    return path
+
+
+# REPLAY
+def replay(recording, on_step=None):
+    """ Re-runs a recording as fast as possible and returns the final SimState
+
+    Args:
+        on_step - optional callable(state) after every step, e.g. to render
+    """
+    state = recording.new_game()
+    step = sim.step
+    for mask, count in recording.runs:
+        inputs = INPUTS[mask]
+        if on_step is None:
+            for _ in range(count):
+                step(state, inputs)
+        else:
+            for _ in range(count):
+                on_step(step(state, inputs))
+    return state
+
+def parameter_errors(recording):
+    """ How the starting parameters of a recording differ from the game's own, [] if they don't.
+        They all come from the file, and a run without mobs or at speed 0 replays just fine.
+    """
+    import asset_manager as assets
+    import jump_game as jg
+
+    if recording.player_type not in range(1, assets.PLAYER_COUNT + 1):
+        return [f'unknown player type {recording.player_type}']
+    player_size, mob_sizes = assets.sprite_sizes(recording.player_type)
+    schedulers = ((sim.MAX_MOBS, sim.SPAWN_INTERVAL), (sim.DENSE_MAX_MOBS, sim.DENSE_SPAWN_INTERVAL))
+    if recording.version >= 3:
+        collision = (jg.Game.pixel_collision, jg.Game.continuous_collision)
+    else:
+        collision = (False, False)  # all the game had before recordings stored flags
+
+    errors = []
+    if recording.game_speed != sim.start_speed(recording.hard):
+        errors.append(f'starting speed {recording.game_speed}, the game starts at {sim.start_speed(recording.hard)}')
+    if recording.player_size != player_size:
+        errors.append(f'player size {recording.player_size}, the sprite is {player_size}')
+    if recording.mob_sizes != mob_sizes:
+        errors.append('mob sizes differ from the sprites')
+    if (recording.max_mobs, recording.spawn_interval) not in schedulers:
+        errors.append(f'unknown spawn scheduler {recording.max_mobs} mobs every {recording.spawn_interval} ticks')
+    if (recording.pixel_collision, recording.continuous_collision) != collision:
+        errors.append('collision settings differ from the game\'s')
+    return errors
+
+def verify(recording, level=None, points=None):
+    """ True if replaying gives the claimed level and points, from the game's own starting parameters.
+        Defaults to the result stored in the recording.
+        Raises ReplayError if the recording's starting parameters are not the game's (see parameter_errors).
+    """
+    if level is None or points is None:
+        if recording.result is None:
+            return False
+        level, points = recording.result[:2]
+
+    errors = parameter_errors(recording)
+    if errors:
+        raise ReplayError(', '.join(errors))
+
+    state = replay(recording)
+    return state.level == level and state.points == points
+
+
+# RENDERED REPLAY
+def watch(recording, speed=1.0):
+    """ Plays a recording back in a window at speed times real time """
+    import pygame
+    import jump_game as jg
+
+    jg.init_app()
+    jg.Game.player_type = recording.player_type
+    game = jg.Game(jg.Player(recording.player_type))
+    game.state = recording.new_game()
+    game.snapshot()
+
+    clock = pygame.time.Clock()
+    steps_per_frame = max(1, int(round(speed)))
+    fps = sim.TICK_RATE * speed / steps_per_frame
+
+    inputs = recording.inputs()
+    finished = False
+    while not finished:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                finished = True
+
+        for _ in range(steps_per_frame):
+            tick = next(inputs, None)
+            if tick is None:
+                finished = True
+                break
+            game.snapshot()
+            sim.step(game.state, tick)
+
+        game.render(None, 1.0)
+        clock.tick(fps)
+
+    jg.shutdown()
+    return game.state
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay a recorded game')
+    parser.add_argument('path')
+    parser.add_argument('--verify', nargs=2, type=int, metavar=('LEVEL', 'POINTS'),
+                        help='exit with 1 unless the replay reaches this level and points')
+    parser.add_argument('--render', action='store_true', help='show the replay in a window')
+    parser.add_argument('--speed', type=float, default=1.0, help='playback speed with --render')
+    args = parser.parse_args()
+
+    try:
+        recording = Recording.load(args.path)
+    except (OSError, ReplayError, struct.error) as e:
+        print(e)
+        return 2
+
+    start = time.perf_counter()
+    state = watch(recording, args.speed) if args.render else replay(recording)
+    elapsed = time.perf_counter() - start
+
+    print(f'ticks: {state.tick} ({state.tick / sim.TICK_RATE:.1f} s of play, replayed in {elapsed:.3f} s)')
+    print(f'level: {state.level}, points: {state.points}')
+
+    if args.verify is not None:
+        level, points = args.verify
+    elif recording.result is not None:
+        level, points = recording.result[:2]
+    else:
+        return 0
+
+    errors = parameter_errors(recording)
+    if errors:
+        print(f"REJECTED: {', '.join(errors)}")
+        return 1
+
+    ok = state.level == level and state.points == points
+    print('verified' if ok else f'MISMATCH: recorded level {level}, points {points}')
+    return 0 if ok else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
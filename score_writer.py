@@ -0,0 +1,118 @@
+import queue
+import threading
+import time
+
+import db_configurations as db
+
+# DEFAULTS
+BATCH_SIZE = 64       # most records committed in one transaction
+BATCH_WINDOW = 0.05   # seconds to wait for more records before committing
+RETRIES = 3           # extra attempts at a batch that failed (e.g. database is locked)
+RETRY_DELAY = 0.5     # seconds before the first retry, doubled for each one after
+FLUSH_TIMEOUT = 2.0   # most flush() waits, the worker keeps going after it
+
+_STOP = object()
+
+
+class ScoreWriter:
+    """ Saves scores on a background thread so the game never waits on disk.
+
+        Records queued with submit() are inserted by a worker thread with its
+        own connection and group-committed: everything that arrives within
+        BATCH_WINDOW of the first record goes into one transaction. A batch
+        that fails is retried, and kept for the next batch if it still fails,
+        so a database locked by another process doesn't lose scores.
+    """
+
+    def __init__(self, db_file, batch_size=BATCH_SIZE, batch_window=BATCH_WINDOW, on_commit=None,
+                 retries=RETRIES, retry_delay=RETRY_DELAY):
+        """
+        Args:
+            db_file - path of the SQLite database
+            on_commit - callable([(id, record)]) run on the worker after each commit
+        """
+        self.db_file = db_file
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.on_commit = on_commit
+        self.unsaved = []  # records of batches that failed every retry, sent again with the next one
+
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name='score-writer', daemon=True)
+        self.thread.start()
+
+    def submit(self, record):
+        """ Queues (player_name, level, score) for saving, returns immediately """
+        self.queue.put(record)
+
+    def flush(self, timeout=FLUSH_TIMEOUT):
+        """ Blocks until every submitted record was handled, at most timeout seconds.
+            Returns False if that took too long or the worker is gone.
+        """
+        deadline = time.monotonic() + timeout
+        with self.queue.all_tasks_done:
+            while self.queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self.thread.is_alive():
+                    return False
+                self.queue.all_tasks_done.wait(min(remaining, 0.1))
+        return True
+
+    def close(self):
+        """ Commits what is left and stops the worker """
+        if self.thread.is_alive():
+            self.queue.put(_STOP)
+            self.thread.join()
+
+    def _next_batch(self):
+        """ Waits for a record, then collects more for up to batch_window """
+        batch = [self.queue.get()]
+        while len(batch) < self.batch_size and batch[-1] is not _STOP:
+            try:
+                batch.append(self.queue.get(timeout=self.batch_window))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        conn = db.create_connection(self.db_file)
+        db.create_table(conn, db.create_table_sql)
+        db.migrate(conn)
+
+        running = True
+        while running:
+            batch = self._next_batch()
+            records = self.unsaved + [record for record in batch if record is not _STOP]
+            running = batch[-1] is not _STOP
+            self.unsaved = []
+
+            try:
+                if records:
+                    self._save(conn, records)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+        if self.unsaved:
+            print(f"{len(self.unsaved)} score(s) could not be saved")
+        conn.close()
+
+    def _save(self, conn, records):
+        """ Inserts records, retrying with a growing delay. Kept in unsaved if every attempt fails """
+        delay = self.retry_delay
+        for attempt in range(self.retries + 1):
+            try:
+                inserted = db.insert_scores(conn, records)
+            except db.Error as e:
+                print(e)
+                if attempt < self.retries:
+                    time.sleep(delay)
+                    delay *= 2
+                continue
+
+            if self.on_commit is not None:
+                self.on_commit(inserted)
+            return
+        self.unsaved = records
@@ -0,0 +1,102 @@
+import pygame
+
+from profiler import PROFILER
+
+# DEFAULTS
+MENU_FPS = 30
+IDLE_TIMEOUT_MS = 500  # how long an idle menu sleeps waiting for input
+
+# RETURNED BY AN EVENT HANDLER TO LEAVE THE SCREEN WITHOUT AN ACTION
+CLOSE = 'close'
+
+
+class ScreenRunner:
+    """ Runs menu screens at a capped frame rate instead of busy spinning.
+
+        Static screens block on pygame.event.wait and are only redrawn when
+        input arrives or a button's mouse-over state changes. Animated
+        screens are updated every frame, capped at fps, and redrawn unless
+        their changed callable says nothing moved.
+    """
+
+    def __init__(self, fps=MENU_FPS, idle_timeout_ms=IDLE_TIMEOUT_MS, on_click=None):
+        """
+        Args:
+            fps - int, maximum redraws per second
+            idle_timeout_ms - int, maximum time to block waiting for an event
+            on_click - callable run when a button returns an action
+        """
+        self.fps = fps
+        self.idle_timeout_ms = idle_timeout_ms
+        self.on_click = on_click
+        self.clock = pygame.time.Clock()
+        self.display = None  # display_backend display to present on, pygame.display if None
+
+    def poll_events(self, animated):
+        """ Returns pending events, sleeping until one arrives if nothing animates """
+        if animated:
+            return pygame.event.get()
+
+        event = pygame.event.wait(self.idle_timeout_ms)
+        if event.type == pygame.NOEVENT:
+            return []
+        return [event] + pygame.event.get()
+
+    def run(self, screen, draw, buttons=(), handle_events=None, animated=False, changed=None):
+        """ Runs a screen until a button or handle_events returns an action
+
+        Args:
+            screen - surface to draw on
+            draw - callable(screen) drawing everything except the buttons
+            buttons - list of UIElement
+            handle_events - callable(events) returning an action, CLOSE or None
+            animated - bool, update every frame instead of only on input
+            changed - callable returning whether an animated screen needs a redraw, default always
+        """
+        # NAMED AFTER THE SCREEN'S CLASS, SUBCLASSES SHARE MenuScreen.draw
+        owner = getattr(draw, '__self__', None)
+        section = 'screen.' + (type(owner).__name__ if owner is not None else draw.__qualname__.split('.')[0])
+        redraw = True
+        while True:
+            events = self.poll_events(animated)
+
+            mouse_up = False
+            for event in events:
+                PROFILER.handle_event(event)
+                if event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                    mouse_up = True
+
+            if handle_events is not None:
+                action = handle_events(events)
+                if action == CLOSE:
+                    return None
+                if action is not None:
+                    return action
+                if events:
+                    redraw = True
+
+            mouse_pos = pygame.mouse.get_pos() if self.display is None else self.display.mouse_pos()
+            for button in buttons:
+                was_over = button.mouse_over
+                ui_action = button.update(mouse_pos, mouse_up)
+                if ui_action is not None:
+                    if self.on_click is not None:
+                        self.on_click()
+
+                    return ui_action
+                if button.mouse_over != was_over:
+                    redraw = True
+
+            if redraw or (animated and (changed is None or changed())):
+                with PROFILER.section(section):
+                    draw(screen)
+                    for button in buttons:
+                        button.draw(screen)
+                PROFILER.draw_overlay(screen)
+                if self.display is None:
+                    pygame.display.flip()
+                else:
+                    self.display.present()
+                redraw = False
+
+            self.clock.tick(self.fps)
@@ -0,0 +1,449 @@
+"""
+Headless simulation of a Dodge me Not run.
+
+The simulation knows nothing about pygame, the display or the keyboard:
+a SimState plus one tick of Inputs goes in, the advanced SimState comes out.
+It always advances by a fixed timestep (TIMESTEP), so gameplay speed does
+not depend on the frame rate, and it can run without a display (e.g. with
+the SDL dummy video driver) at thousands of steps per second.
+"""
+
+import broad_phase
+
+# TIMING
+TICK_RATE = 60  # simulation steps per second
+TIMESTEP = 1.0 / TICK_RATE
+
+# WORLD
+FLOOR = 400
+GRAVITY = 0.4
+SCREEN_WIDTH = 750
+FLOOR_TILE_OFFSET = 500
+
+# PLAYER
+PLAYER_SPEED = 10
+JUMP_VELOCITY = -11
+PLAYER_START_X = 75  # center
+PLAYER_MAX_X = 718
+
+# MOBS
+MOB_TYPES = range(1, 8)
+FLYING_MOB_TYPES = (6, 7)
+FLYING_HEIGHT_RANGE = (150, 200)
+
+# SPAWN SCHEDULER (the classic game is one mob at a time, a new one as soon as it's gone)
+MAX_MOBS = 1
+SPAWN_INTERVAL = 0  # minimum ticks between spawns
+DENSE_MAX_MOBS = 32
+DENSE_SPAWN_INTERVAL = 40
+
+# DIFFICULTY
+LEVEL_POINTS = 750
+BACKGROUND_COUNT = 7
+EASY_SPEED = 3
+HARD_SPEED = 8
+EASY_SPEED_STEP = 2
+HARD_SPEED_STEP = 2.5
+EASY_POINTS_STEP = 1
+HARD_POINTS_STEP = 2
+
+# RANDOM NUMBERS (32-bit LCG, so the whole RNG state is one int in SimState)
+RNG_MULTIPLIER = 1664525
+RNG_INCREMENT = 1013904223
+RNG_MASK = 0xFFFFFFFF
+
+
+def next_seed(seed):
+    return (seed * RNG_MULTIPLIER + RNG_INCREMENT) & RNG_MASK
+
+def random_range(seed, start, stop):
+    """ Returns (value in [start, stop), next seed) """
+    seed = next_seed(seed)
+    return start + (seed >> 16) % (stop - start), seed
+
+def start_speed(hard):
+    return HARD_SPEED if hard else EASY_SPEED
+
+
+class Inputs:
+    """ The player's input for one tick """
+
+    def __init__(self, move_left=False, move_right=False, jump=False, move_down=False):
+        self.move_left = move_left
+        self.move_right = move_right
+        self.jump = jump  # pressed during this tick
+        self.move_down = move_down  # held
+
+NO_INPUT = Inputs()
+
+
+class PlayerBody:
+    """ Player position and velocity, (x, y) is the top left corner """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.x = PLAYER_START_X - width // 2
+        self.y = FLOOR - height // 2
+        self.vel_y = 0
+        self.jumping = True
+        self.move_up = False  # jump requested, performed once on the floor
+        self.direction = 1
+        self.flip = False
+        self.dx = 0  # movement of the last step, for swept collision
+        self.dy = 0
+
+    def copy(self):
+        body = PlayerBody.__new__(PlayerBody)
+        body.__dict__.update(self.__dict__)
+        return body
+
+
+class MobBody:
+    """ Mob position, (x, y) is the top left corner """
+
+    __slots__ = ('id', 'type', 'x', 'y', 'width', 'height')
+
+    def __init__(self, mob_id, mob_type, x, y, width, height):
+        self.reset(mob_id, mob_type, x, y, width, height)
+
+    def reset(self, mob_id, mob_type, x, y, width, height):
+        """ Reinitializes a recycled body """
+        self.id = mob_id
+        self.type = mob_type
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+
+    def copy(self):
+        return MobBody(self.id, self.type, self.x, self.y, self.width, self.height)
+
+
+class Hitboxes:
+    """ Pixel masks of the sprites, tested once bounding boxes overlap.
+        A mask only needs overlap(other, offset), as pygame.mask.Mask has;
+        the simulation itself never imports pygame.
+    """
+
+    __slots__ = ('player', 'mobs')
+
+    def __init__(self, player, mobs):
+        """
+        Args:
+            player - (mask facing right, mask flipped)
+            mobs - dict {mob_type: mask}
+        """
+        self.player = player
+        self.mobs = mobs
+
+
+class SimState:
+    """ Everything needed to continue a run """
+
+    def __init__(self, player, mob_sizes, hard, game_speed, seed, max_mobs=MAX_MOBS,
+                 spawn_interval=SPAWN_INTERVAL, hitboxes=None, continuous=False):
+        """
+        Args:
+            player - PlayerBody
+            mob_sizes - dict {mob_type: (width, height)}
+            hard - bool, hard difficulty
+            game_speed - starting scroll speed in pixels per tick
+            seed - int, state of the random number generator
+            max_mobs - int, most mobs on screen at once
+            spawn_interval - int, minimum ticks between two spawns
+            hitboxes - Hitboxes for pixel-accurate collision, None for bounding boxes
+            continuous - bool, test the whole movement of each step (swept), not only where it ended
+        """
+        self.player = player
+        self.mobs = []  # always ordered by x: all spawn at the right edge and scroll together
+        self.mob_sizes = mob_sizes
+        self.min_mob_width = min(width for width, _ in mob_sizes.values())
+        self.max_mob_width = max(width for width, _ in mob_sizes.values())
+        self.max_mobs = max_mobs
+        self.spawn_interval = spawn_interval
+        self.next_spawn = 0  # tick of the earliest next spawn
+        self.hitboxes = hitboxes
+        self.continuous = continuous
+        self.free_mobs = []  # MobBodies that left the screen, reused by spawn_mob
+        self.hard = hard
+        self.game_speed = game_speed
+        self.seed = seed & RNG_MASK
+
+        self.points = 0
+        self.level = 1
+        self.background = 1
+        self.floor_pos = 0
+        self.tick = 0
+        self.next_mob_id = 0
+
+        self.over = False
+        self.death_cause = None  # type of the mob that hit the player
+
+    def copy(self):
+        state = SimState.__new__(SimState)
+        state.__dict__.update(self.__dict__)
+        state.player = self.player.copy()
+        state.mobs = [mob.copy() for mob in self.mobs]
+        state.free_mobs = []
+        return state
+
+    def stats(self):
+        """ Same shape as Game.game_loop returns """
+        return [self.level, self.points]
+
+
+def new_game(player_size, mob_sizes, hard=False, game_speed=None, seed=0, max_mobs=MAX_MOBS,
+             spawn_interval=SPAWN_INTERVAL, hitboxes=None, continuous=False):
+    """ Creates the initial state of a run """
+    if game_speed is None:
+        game_speed = start_speed(hard)
+    return SimState(PlayerBody(*player_size), mob_sizes, hard, game_speed, seed, max_mobs, spawn_interval,
+                    hitboxes, continuous)
+
+
+# STEP PHASES
+def move_player(player, inputs):
+    """ Walking, jumping, gravity and floor collision (was Player.move) """
+    dx = 0
+    dy = 0
+
+    if inputs.jump:
+        player.move_up = True
+
+    # MOVE LEFT AND RIGHT
+    if inputs.move_left and player.x > 0:
+        dx = -PLAYER_SPEED
+        player.flip = True
+        player.direction = -1
+    if inputs.move_right and player.x <= PLAYER_MAX_X:
+        dx = PLAYER_SPEED
+        player.flip = False
+        player.direction = 1
+    # MOVING DOWN
+    if inputs.move_down:
+        dy = PLAYER_SPEED
+
+    # JUMP MOVEMENT
+    if player.move_up and not player.jumping:
+        player.vel_y = JUMP_VELOCITY
+        player.move_up = False
+        player.jumping = True
+
+    # GRAVITY
+    player.vel_y += GRAVITY
+    dy += player.vel_y
+
+    # CHECK FLOOR COLLISION
+    bottom = player.y + player.height
+    if bottom + dy > FLOOR:
+        dy = FLOOR - bottom
+        player.jumping = False
+
+    player.x += dx
+    player.y += dy
+    player.dx = dx
+    player.dy = dy
+
+def scroll_floor(state):
+    state.floor_pos -= state.game_speed
+    if state.floor_pos <= -FLOOR_TILE_OFFSET:
+        state.floor_pos = 0
+
+def spawn_mob(state):
+    """ Spawns a mob at the right edge of the screen """
+    mob_type, state.seed = random_range(state.seed, MOB_TYPES.start, MOB_TYPES.stop)
+    rand_height, state.seed = random_range(state.seed, *FLYING_HEIGHT_RANGE)
+    width, height = state.mob_sizes[mob_type]
+
+    if mob_type in FLYING_MOB_TYPES:
+        y = height + rand_height
+    else:
+        y = FLOOR - height
+
+    if state.free_mobs:
+        mob = state.free_mobs.pop()
+        mob.reset(state.next_mob_id, mob_type, SCREEN_WIDTH, y, width, height)
+    else:
+        mob = MobBody(state.next_mob_id, mob_type, SCREEN_WIDTH, y, width, height)
+    state.mobs.append(mob)
+    state.next_mob_id += 1
+
+def spawn_mobs(state):
+    """ Spawn scheduler: one mob at most every spawn_interval ticks, up to max_mobs at once """
+    if len(state.mobs) < state.max_mobs and state.tick >= state.next_spawn:
+        spawn_mob(state)
+        state.next_spawn = state.tick + state.spawn_interval
+
+def collides(player, mob):
+    """ Same test as Rect.colliderect """
+    return (player.x < mob.x + mob.width and mob.x < player.x + player.width
+            and player.y < mob.y + mob.height and mob.y < player.y + player.height)
+
+def masks_overlap(hitboxes, player, mob):
+    """ Pixel test, at the rounded positions the sprites are drawn at """
+    offset = (round(mob.x) - round(player.x), round(mob.y) - round(player.y))
+    return hitboxes.player[player.flip].overlap(hitboxes.mobs[mob.type], offset) is not None
+
+def _axis_overlap(start, velocity, low, high):
+    """ (enter, exit), the part of the step in [0, 1] during which low < start + velocity * t < high """
+    if velocity == 0:
+        return (0.0, 1.0) if low < start < high else (1.0, 0.0)
+    enter = (low - start) / velocity
+    leave = (high - start) / velocity
+    if enter > leave:
+        enter, leave = leave, enter
+    return max(enter, 0.0), min(leave, 1.0)
+
+def time_of_impact(player, mob, game_speed):
+    """ Swept AABB: (enter, exit) as fractions of the last step if mob's box overlapped
+        the player's at some point of it, None if it never did.
+        Both moved in a straight line: the player by (dx, dy), the mob by game_speed to the left.
+    """
+    # MOB MOTION RELATIVE TO THE PLAYER, BACK TO WHERE THE STEP STARTED
+    vx = -game_speed - player.dx
+    x = mob.x - player.x - vx
+    enter, leave = _axis_overlap(x, vx, -mob.width, player.width)
+    if enter >= leave:
+        return None  # never close enough horizontally, y doesn't matter
+
+    vy = -player.dy
+    y = mob.y - player.y - vy
+    enter_y, leave_y = _axis_overlap(y, vy, -mob.height, player.height)
+    enter = max(enter, enter_y)
+    leave = min(leave, leave_y)
+    if enter >= leave:
+        return None
+    return enter, leave
+
+def swept_masks_overlap(hitboxes, player, mob, game_speed, enter, leave):
+    """ Pixel test along the part of the step the boxes overlapped, at most a pixel of movement apart """
+    mask = hitboxes.player[player.flip]
+    mob_mask = hitboxes.mobs[mob.type]
+    distance = max(abs(game_speed + player.dx), abs(player.dy)) * (leave - enter)
+    samples = int(distance) + 1
+    for i in range(samples + 1):
+        back = 1.0 - (enter + (leave - enter) * i / samples)  # how much of the step is left to undo
+        offset = (round(mob.x + game_speed * back) - round(player.x - player.dx * back),
+                  round(mob.y) - round(player.y - player.dy * back))
+        if mask.overlap(mob_mask, offset) is not None:
+            return True
+    return False
+
+def touched(state, mob):
+    """ Continuous collision: mob touched the player anywhere along the step, not only at its end """
+    player = state.player
+    hitboxes = state.hitboxes
+    if collides(player, mob) and (hitboxes is None or masks_overlap(hitboxes, player, mob)):
+        return True
+
+    overlap = time_of_impact(player, mob, state.game_speed)
+    if overlap is None:
+        return False
+    return hitboxes is None or swept_masks_overlap(hitboxes, player, mob, state.game_speed, *overlap)
+
+def move_mobs(state):
+    """ Scrolls mobs left """
+    for mob in state.mobs:
+        mob.x -= state.game_speed
+
+def remove_offscreen_mobs(state):
+    """ Drops mobs that left the screen (after this tick's collision check).
+        Only the leftmost few can be gone, so the rest of the list isn't looked at.
+        Removed bodies go back to state.free_mobs for the next spawns.
+    """
+    mobs = state.mobs
+    end = broad_phase.bisect_right_x(mobs, -state.min_mob_width)
+    if end and any(mob.x <= -mob.width for mob in mobs[:end]):
+        leftmost = mobs[:end]
+        mobs[:end] = [mob for mob in leftmost if mob.x > -mob.width]
+        state.free_mobs.extend(mob for mob in leftmost if mob.x <= -mob.width)
+
+def check_collisions(state):
+    """ Ends the run if a mob touches the player, testing only mobs near it.
+        With hitboxes, the pixel test only runs for mobs whose bounding box overlaps.
+        A continuous state also catches mobs that crossed the player between two steps.
+    """
+    if state.continuous:
+        player = state.player
+        mobs = broad_phase.candidates(state.mobs, player, state.max_mob_width, state.game_speed + player.dx)
+        for mob in mobs:
+            if touched(state, mob):
+                state.over = True
+                state.death_cause = mob.type
+                return
+        return
+
+    hitboxes = state.hitboxes
+    for mob in broad_phase.candidates(state.mobs, state.player, state.max_mob_width):
+        if collides(state.player, mob) and (hitboxes is None or masks_overlap(hitboxes, state.player, mob)):
+            state.over = True
+            state.death_cause = mob.type
+            return
+
+def score(state):
+    """ Increase score, level up every LEVEL_POINTS points (was Game.score) """
+    state.points += HARD_POINTS_STEP if state.hard else EASY_POINTS_STEP
+
+    if state.points % LEVEL_POINTS == 0:
+        state.level += 1
+        state.background += 1
+        state.game_speed += HARD_SPEED_STEP if state.hard else EASY_SPEED_STEP
+
+    if state.level > BACKGROUND_COUNT and state.background > BACKGROUND_COUNT:
+        state.background = 1
+
+def step(state, inputs=NO_INPUT):
+    """ Advances state by one fixed timestep and returns it.
+        A finished run (state.over) is returned unchanged.
+    """
+    if state.over:
+        return state
+
+    state.tick += 1
+    scroll_floor(state)
+    move_player(state.player, inputs)
+    spawn_mobs(state)
+    move_mobs(state)
+    check_collisions(state)
+    remove_offscreen_mobs(state)
+    if not state.over:
+        score(state)
+    return state
+
+def profiled_step(state, inputs, section):
+    """ step, timing each phase with section(name) (see profiler.Profiler.section).
+        Kept separate so plain step pays nothing for it; the phases must match.
+    """
+    if state.over:
+        return state
+
+    state.tick += 1
+    with section('floor_scroll'):
+        scroll_floor(state)
+    with section('player_update'):
+        move_player(state.player, inputs)
+    with section('mob_update'):
+        spawn_mobs(state)
+        move_mobs(state)
+    with section('collision'):
+        check_collisions(state)
+    with section('mob_cleanup'):
+        remove_offscreen_mobs(state)
+    if not state.over:
+        with section('score'):
+            score(state)
+    return state
+
+def run(state, policy=None, max_steps=None):
+    """ Steps state until the run is over (or max_steps), as fast as possible.
+
+    Args:
+        policy - callable(state) returning Inputs, None for no input
+        max_steps - int or None
+    """
+    steps = 0
+    while not state.over and (max_steps is None or steps < max_steps):
+        step(state, policy(state) if policy is not None else NO_INPUT)
+        steps += 1
+    return state
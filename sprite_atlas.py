@@ -0,0 +1,91 @@
+"""
+Sprite atlas: many small images packed into one surface.
+
+A sprite is drawn with screen.blit(page, position, area), area being its
+rect inside the atlas page, so drawing never creates a surface and the
+sprites of a frame are read from the same block of memory. Images are
+packed in rows (shelves); when a page is full another one is started.
+"""
+
+import pygame
+
+# DEFAULTS
+PAGE_SIZE = (1024, 1024)
+PADDING = 1  # transparent pixels between images, so areas never bleed into each other
+
+
+class Atlas:
+    """ Keyed images packed into as few surfaces (pages) as possible """
+
+    def __init__(self, page_size=PAGE_SIZE):
+        self.page_size = page_size
+        self.pages = []
+        self.regions = {}  # key -> (page, area Rect)
+
+        # CURRENT SHELF OF THE LAST PAGE
+        self.x = 0
+        self.y = 0
+        self.shelf_height = 0
+
+    def _new_page(self, size):
+        page = pygame.Surface(size, pygame.SRCALPHA)
+        if pygame.display.get_surface() is not None:
+            page = page.convert_alpha()
+        page.fill((0, 0, 0, 0))
+        self.pages.append(page)
+        self.x = self.y = self.shelf_height = 0
+        return page
+
+    def _place(self, width, height):
+        """ Returns (page, x, y) of a free spot for a width x height image """
+        page_width, page_height = self.page_size
+        if width > page_width or height > page_height:
+            return self._new_page((width, height)), 0, 0  # too big to share a page
+
+        if not self.pages or self.pages[-1].get_size() != self.page_size:
+            self._new_page(self.page_size)
+        if self.x + width > page_width:
+            self.x = 0
+            self.y += self.shelf_height + PADDING
+            self.shelf_height = 0
+        if self.y + height > page_height:
+            self._new_page(self.page_size)
+
+        x, y = self.x, self.y
+        self.x += width + PADDING
+        self.shelf_height = max(self.shelf_height, height)
+        return self.pages[-1], x, y
+
+    def add(self, key, surface):
+        """ Copies surface into the atlas under key, returns its (page, area) """
+        region = self.regions.get(key)
+        if region is not None:
+            return region
+
+        width, height = surface.get_size()
+        page, x, y = self._place(width, height)
+        area = pygame.Rect(x, y, width, height)
+        # MAX onto a cleared area copies the pixels, alpha included, instead of blending them
+        page.fill((0, 0, 0, 0), area)
+        page.blit(surface, area, special_flags=pygame.BLEND_RGBA_MAX)
+
+        region = (page, area)
+        self.regions[key] = region
+        return region
+
+    def get(self, key, create=None):
+        """ The (page, area) of key, adding create() on a miss """
+        region = self.regions.get(key)
+        if region is None and create is not None:
+            region = self.add(key, create())
+        return region
+
+    def clear(self):
+        """ Forgets every image (areas handed out before become invalid); the pages are reused """
+        self.regions.clear()
+        del self.pages[1:]
+        self.x = self.y = self.shelf_height = 0
+
+    def draw(self, surface, key, position):
+        page, area = self.regions[key]
+        return surface.blit(page, position, area)
@@ -0,0 +1,11 @@
+import os
+import sys
+
+# HEADLESS: must be set before pygame opens anything
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+# THE GAME IMPORTS ITS MODULES AND LOADS ITS ASSETS FROM THE REPOSITORY ROOT
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
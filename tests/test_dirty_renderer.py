@@ -0,0 +1,44 @@
+import pygame
+
+import jump_game as jg
+from benchmarks.bench_rendering import open_display
+
+
+class Stop(Exception):
+    """ Leaves Game.frame_loop after the frame under test """
+
+
+def test_resume_after_pause_repaints_the_menu_away(monkeypatch):
+    screen = open_display()
+    monkeypatch.setattr(jg.Game, 'dirty_rendering', True)
+    monkeypatch.setattr(jg.Game, 'pause', False)
+
+    game = jg.Game(jg.Player(1))
+    render = game.render
+    alphas = []
+
+    def render_frame(renderer, alpha):
+        render(renderer, alpha)
+        alphas.append(alpha)
+        if len(alphas) == 3:
+            pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_ESCAPE, unicode='\x1b'))
+        if len(alphas) == 8:
+            raise Stop
+
+    def pause_menu(screen):
+        # DRAWN OVER THE WHOLE SCREEN, THEN LEFT AS IF ESC WAS PRESSED AGAIN
+        jg.SCREENS.pause.draw(screen)
+        return None
+
+    monkeypatch.setattr(game, 'render', render_frame)
+    monkeypatch.setattr(jg.SCREENS.pause, 'run', pause_menu)
+    pygame.event.clear()
+    try:
+        game.frame_loop()
+    except Stop:
+        pass
+
+    dirty_frame = pygame.image.tobytes(screen, 'RGB')
+    render(None, alphas[-1])  # the same frame, repainted in full
+    assert dirty_frame == pygame.image.tobytes(screen, 'RGB')
+    game.reset()
@@ -0,0 +1,52 @@
+import db_configurations as db
+from leaderboard_cache import LeaderboardCache
+from score_writer import ScoreWriter
+
+
+def _connect(path):
+    conn = db.create_connection(path)
+    db.create_table(conn, db.create_table_sql)
+    db.migrate(conn)
+    return conn
+
+def _counted(cache):
+    """ Counts the cache's load() calls from now on """
+    loads = []
+    load = cache.load
+    cache.load = lambda: (loads.append(1), load())
+    return loads
+
+
+def test_top_reloads_only_after_a_commit(tmp_path):
+    path = str(tmp_path / 'scores.db')
+    conn = _connect(path)
+    db.insert_scores(conn, [('a', 1, 10), ('b', 2, 30)])
+    cache = LeaderboardCache(conn, size=2)
+    loads = _counted(cache)
+
+    assert [row[1] for row in cache.top()] == ['b', 'a']
+    assert [row[1] for row in cache.top()] == ['b', 'a']
+    assert loads == []
+
+    # SAVES FROM THE GAME'S WRITER: ONE RELOAD, HOWEVER MANY SCORES
+    writer = ScoreWriter(path)
+    for record in (('c', 1, 20), ('d', 3, 40), ('e', 1, 5)):
+        writer.submit(record)
+    assert writer.flush()
+    assert [row[1] for row in cache.top()] == ['d', 'b']
+    assert [row[1] for row in cache.top()] == ['d', 'b']
+    assert len(loads) == 1
+    writer.close()
+
+def test_scores_deleted_elsewhere_leave_the_cache(tmp_path):
+    path = str(tmp_path / 'scores.db')
+    conn = _connect(path)
+    db.insert_scores(conn, [('a', 1, 10), ('b', 2, 30), ('c', 1, 20)])
+    cache = LeaderboardCache(conn, size=2)
+    loads = _counted(cache)
+
+    other = _connect(path)
+    with other:
+        other.execute("DELETE FROM game_records WHERE player_name = 'b'")
+    assert [row[1] for row in cache.top()] == ['c', 'a']
+    assert len(loads) == 1